@@ -1,35 +1,73 @@
+import json
+import time
 import tkinter as tk
-from tkinter import simpledialog, colorchooser, messagebox
-from shape import RectangleShape, CircleShape, TriangleShape, ShapeGroup
+from tkinter import simpledialog, colorchooser, messagebox, filedialog
+from shape import RectangleShape, CircleShape, TriangleShape, shape_to_record, shape_from_record
+from packing import shape_from_spec
+import layout_io
 from visitor import AreaCalculatorVisitor
-from PIL import Image, ImageDraw, ImageFont
+from room import RoomModel, LayoutError, AreaLimitExceeded, NoFreeSpace, ShapeTooLarge
+from jobs import JobRunner
+from placement import shutdown_spawn_pool
+from export import export_png
+from svg import export_svg
+from viewport import Viewport
 
 
 class SpacePlannerApp:
-    def __init__(self, root, room_width, room_height):
+    # Taille maximale du canvas : au-delà, la pièce est vue à travers un viewport zoomable
+    MAX_CANVAS_WIDTH = 1200
+    MAX_CANVAS_HEIGHT = 800
+
+    def __init__(self, root, room_width, room_height, raster_resolution=None, drag_fps=60,
+                 workers=None):
         self.root = root
+        self.root.title("Space Planner")
+
+        # Modèle de la pièce (règles, placement) ; l'application n'en est que la vue
+        self.room = RoomModel(room_width, room_height, raster_resolution, workers)
         self.room_width = room_width
         self.room_height = room_height
-        self.root.title("Space Planner")
-        self.room_area = self.room_width * self.room_height
+        self.room_area = self.room.area
+        self.shape_group = self.room.shape_group
 
         # Cadre à gauche pour les boutons et détails
         self.control_frame = tk.Frame(self.root, bg="#f5f5f5")
         self.control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
 
-        # Canvas à droite
-        self.canvas = tk.Canvas(self.root, width=room_width, height=room_height, bg="#f0e6d6")
+        # Canvas à droite, borné ; molette : zoom, clic droit ou milieu glissé : déplacement
+        canvas_width = min(room_width, self.MAX_CANVAS_WIDTH)
+        canvas_height = min(room_height, self.MAX_CANVAS_HEIGHT)
+        self.canvas = tk.Canvas(self.root, width=canvas_width, height=canvas_height, bg="#f0e6d6")
         self.canvas.pack(side=tk.RIGHT, padx=5, pady=5)
+        self.view = Viewport(self.canvas, self.shape_group, canvas_width, canvas_height)
+        self.view.fit(room_width, room_height)
+        self._pan_from = None
 
-        self.shape_group = ShapeGroup()
         self.selected_shape = None
         self.drag_offset_x = 0
         self.drag_offset_y = 0
 
+        # Glisser-déposer : seule la dernière position du pointeur est gardée,
+        # et au plus une mise à jour est traitée par image.
+        self.drag_fps = drag_fps
+        self._drag_target = None
+        self._drag_job = None
+        self._last_drag_frame = 0.0
+
         self.current_shape_type = tk.StringVar(value="rectangle")
 
+        # Comportement d'un déplacement bloqué : "block" (refusé),
+        # "contact" (arrêt au contact) ou "slide" (glissement le long de l'obstacle)
+        self.drag_mode = tk.StringVar(value="block")
+
         # Valeur par défaut de l'angle de rotation
         self.rotation_angle = tk.IntVar(value=15)
+        # Si la rotation est bloquée, chercher la position libre la plus proche
+        self.fit_rotation = tk.BooleanVar(value=False)
+
+        # Opérations lourdes (placement, export) exécutées hors de la boucle Tk
+        self.jobs = JobRunner(self.root)
 
         self.setup_controls()
         self.bind_events()
@@ -55,14 +93,14 @@ class SpacePlannerApp:
         btn.pack(fill=tk.X, pady=4)
         return btn
 
-    def _styled_radiobutton(self, parent, text, value):
+    def _styled_radiobutton(self, parent, text, value, variable=None):
         """
         Crée un Radiobutton stylisé (plein, sans cercle).
         """
         rb = tk.Radiobutton(
             parent,
             text=text,
-            variable=self.current_shape_type,
+            variable=variable if variable is not None else self.current_shape_type,
             value=value,
             font=("Helvetica", 10),
             bg="#f5f5f5",
@@ -97,7 +135,10 @@ class SpacePlannerApp:
 
         # Boutons d'action
         self._styled_button(self.control_frame, "Add Shape", self.add_shape)
+        self._styled_button(self.control_frame, "Bulk Add", self.bulk_add_shapes)
         self._styled_button(self.control_frame, "Delete Shape", self.delete_shape)
+        self._styled_button(self.control_frame, "Undo", self.undo)
+        self._styled_button(self.control_frame, "Redo", self.redo)
 
         rotate_btn = self._styled_button(self.control_frame, "Rotate Shape", self.rotate_shape)
 
@@ -123,8 +164,35 @@ class SpacePlannerApp:
         )
         angle_entry.pack(side=tk.LEFT)
 
+        fit_check = tk.Checkbutton(
+            self.control_frame,
+            text="Ajuster la position",
+            variable=self.fit_rotation,
+            font=("Helvetica", 10),
+            bg="#f5f5f5",
+            fg="#333333",
+            activebackground="#f5f5f5",
+        )
+        fit_check.pack(anchor=tk.W, pady=(0, 10))
+
+        # Mode de déplacement en cas de collision
+        mode_lbl = tk.Label(
+            self.control_frame,
+            text="Collision :",
+            font=("Helvetica", 10),
+            bg="#f5f5f5",
+            fg="#333333"
+        )
+        mode_lbl.pack(anchor=tk.W)
+        self._styled_radiobutton(self.control_frame, "Bloquer", "block", self.drag_mode)
+        self._styled_radiobutton(self.control_frame, "Arrêt au contact", "contact", self.drag_mode)
+        self._styled_radiobutton(self.control_frame, "Glisser", "slide", self.drag_mode)
+
         self._styled_button(self.control_frame, "Détails", self.calculate_area)
         self._styled_button(self.control_frame, "Save as PNG", lambda: self.export_canvas_to_png())
+        self._styled_button(self.control_frame, "Save as SVG", lambda: self.export_to_svg())
+        self._styled_button(self.control_frame, "Save Layout", self.save_layout)
+        self._styled_button(self.control_frame, "Open Layout", self.open_layout)
 
         # Étiquette d'aire totale
         self.area_label = tk.Label(
@@ -138,6 +206,19 @@ class SpacePlannerApp:
         )
         self.area_label.pack(fill=tk.X, pady=(10, 0))
 
+        # Travaux en cours et annulation
+        self.status_label = tk.Label(
+            self.control_frame,
+            text="",
+            font=("Helvetica", 9),
+            bg="#f5f5f5",
+            fg="#666666",
+            wraplength=140,
+            justify=tk.LEFT
+        )
+        self.status_label.pack(fill=tk.X, pady=(5, 0))
+        self._styled_button(self.control_frame, "Annuler", self.cancel_jobs)
+
         # Séparateur
         sep = tk.Frame(self.control_frame, height=1, bg="#cccccc")
         sep.pack(fill=tk.X, pady=10)
@@ -167,43 +248,108 @@ class SpacePlannerApp:
     def bind_events(self):
         self.canvas.bind("<Button-1>", self.on_click)
         self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        for button in (2, 3):
+            self.canvas.bind(f"<ButtonPress-{button}>", self.on_pan_start)
+            self.canvas.bind(f"<B{button}-Motion>", self.on_pan)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)  # molette sous X11
+        self.canvas.bind("<Button-5>", self.on_wheel)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """
+        Fermeture de la fenêtre : les tâches en cours sont annulées, celles
+        en attente abandonnées, et les processus de recherche arrêtés.
+        """
+        self.jobs.shutdown()
+        shutdown_spawn_pool()
+        self.root.destroy()
+
+    def on_wheel(self, event):
+        zoom_in = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.view.zoom(1.25 if zoom_in else 0.8, event.x, event.y)
+
+    def on_pan_start(self, event):
+        self._pan_from = (event.x, event.y)
+
+    def on_pan(self, event):
+        if self._pan_from is None:
+            return
+        self.view.pan(event.x - self._pan_from[0], event.y - self._pan_from[1])
+        self._pan_from = (event.x, event.y)
 
     def on_click(self, event):
         """
         Sélectionne la forme cliquée, affiche ses détails,
         ou désélectionne si clic en dehors.
         """
-        for shape in reversed(self.shape_group.children):
-            if shape.contains(event.x, event.y):
-                self.selected_shape = shape
-                self.drag_offset_x = event.x - shape.x
-                self.drag_offset_y = event.y - shape.y
-                self.show_shape_details(shape)
-                return
+        self.room.history.seal()  # chaque glisser-déposer est une entrée d'historique
+        x, y = self.view.to_world(event.x, event.y)
+        shape = self.room.shape_at(x, y)
+        if shape is not None:
+            self.selected_shape = shape
+            self.drag_offset_x = x - shape.x
+            self.drag_offset_y = y - shape.y
+            self.show_shape_details(shape)
+            return
 
         # Clic en dehors de toute forme
         self.selected_shape = None
         self.detail_label.config(text="Aucune forme sélectionnée")
 
     def on_drag(self, event):
-        if self.selected_shape:
-            new_x = event.x - self.drag_offset_x
-            new_y = event.y - self.drag_offset_y
+        """
+        Mémorise la position du pointeur et programme une mise à jour pour
+        la prochaine image ; les positions intermédiaires sont abandonnées.
+        """
+        if not self.selected_shape:
+            return
+        self._drag_target = (event.x, event.y)
+        if self._drag_job is None:
+            frame = 1.0 / self.drag_fps
+            delay = frame - (time.perf_counter() - self._last_drag_frame)
+            if delay > 0:
+                self._drag_job = self.root.after(int(delay * 1000) or 1, self._process_drag)
+            else:
+                self._drag_job = self.root.after_idle(self._process_drag)
+
+    def on_release(self, event):
+        # Applique immédiatement la dernière position en attente
+        if self._drag_job is not None:
+            self.root.after_cancel(self._drag_job)
+            self._process_drag()
+        self.room.history.seal()
+
+    def _process_drag(self):
+        self._drag_job = None
+        target, self._drag_target = self._drag_target, None
+        if target is None or not self.selected_shape:
+            return
+        self._last_drag_frame = time.perf_counter()
 
-            moved = self.selected_shape.move_to(
-                new_x, new_y, self.room_width, self.room_height, self.shape_group.children
-            )
-            if moved:
-                self.redraw()
+        x, y = self.view.to_world(*target)
+        new_x = x - self.drag_offset_x
+        new_y = y - self.drag_offset_y
+        moved = self.room.move(self.selected_shape, new_x, new_y, self.drag_mode.get())
+        if moved:
+            self.view.refresh(self.selected_shape)
 
     def redraw(self):
-        self.canvas.delete("all")
-        self.shape_group.draw(self.canvas)
+        """
+        Reconstruction complète du canvas (nouvelle pièce), recadrée sur
+        toute la pièce : les modifications courantes passent par refresh() /
+        erase() de la forme concernée.
+        """
+        self.view.set_group(self.shape_group)
+        self.view.fit(self.room_width, self.room_height)
+        self.update_area_label()
 
-        visitor = AreaCalculatorVisitor()
-        self.shape_group.accept(visitor)
-        total = visitor.get_total_area()
-        remaining = self.room_width * self.room_height - total
+    def update_area_label(self):
+        total = self.room.used_area()
+        remaining = self.room.remaining_area()
         self.area_label.config(
             text=f"Room Area = {self.room_area:.2f}\nUsed: {total:.2f}\nRemaining: {remaining:.2f}"
         )
@@ -216,23 +362,18 @@ class SpacePlannerApp:
         if color is None:
             return
 
-        shape = None
-        shape_area = 0
-
         if self.current_shape_type.get() == "rectangle":
             w = simpledialog.askinteger("Width", "Enter width :")
             h = simpledialog.askinteger("Height", "Enter height :")
             if w is None or h is None:
                 return
             shape = RectangleShape(name, 0, 0, w, h, color, angle=0)
-            shape_area = w * h
 
         elif self.current_shape_type.get() == "circle":
             r = simpledialog.askinteger("Radius", "Enter radius :")
             if r is None:
                 return
             shape = CircleShape(name, 0, 0, r, color)
-            shape_area = 3.14 * r * r
 
         else:  # triangle
             b = simpledialog.askinteger("Base", "Enter base length :")
@@ -240,46 +381,160 @@ class SpacePlannerApp:
             if b is None or h is None:
                 return
             shape = TriangleShape(name, 0, 0, b, h, color, angle=0)
-            shape_area = (b * h) / 2
 
-        visitor = AreaCalculatorVisitor()
-        self.shape_group.accept(visitor)
-        if visitor.get_total_area() + shape_area > self.room_width * self.room_height:
-            messagebox.showerror("Surface limit exceeded", "Not enough space in the room. Please remove a shape.")
+        try:
+            self.room.check_area(shape)
+        except LayoutError as error:
+            messagebox.showerror(self._error_title(error), str(error))
             return
+        self._place_in_background(shape)
+
+    def _place_in_background(self, shape):
+        """
+        Recherche l'emplacement sur un instantané de la pièce, hors du thread
+        de l'interface, puis ajoute la forme d'un coup une fois la recherche
+        terminée ; si l'emplacement a été occupé entre-temps, la recherche
+        est relancée.
+        """
+        snapshot = self.room.snapshot()
+
+        def done(position):
+            try:
+                self.room.place(shape, position)
+            except NoFreeSpace as error:
+                if position is not None:
+                    self._place_in_background(shape)
+                    return
+                messagebox.showerror(self._error_title(error), str(error))
+                return
+            except LayoutError as error:
+                messagebox.showerror(self._error_title(error), str(error))
+                return
+            self.view.refresh(shape)
+            self.update_area_label()
+
+        self._run_job(
+            f"Placement de {shape.name}",
+            lambda job: snapshot.find_spawn_position(shape, job.report),
+            on_done=done,
+            on_error=lambda error: messagebox.showerror("Erreur", str(error)),
+        )
+
+    def _run_job(self, description, func, on_done=None, on_error=None):
+        def finish(callback):
+            def wrapper(value):
+                self._update_job_status()
+                if callback is not None:
+                    callback(value)
+            return wrapper
+
+        self.jobs.submit(
+            description, func,
+            on_done=finish(on_done), on_error=finish(on_error),
+            on_progress=self._update_job_status, on_cancel=self._update_job_status,
+        )
+        self._update_job_status()
 
-        spawn = self.find_spawn_position(shape)
-        if spawn is None:
-            messagebox.showerror("Aucun emplacement libre", "Impossible de placer la forme : plus d'espace disponible.")
+    def _update_job_status(self, job=None):
+        jobs = list(self.jobs.jobs)
+        if not jobs:
+            self.status_label.config(text="")
             return
+        text = "\n".join(f"{j.description} : {j.progress:.0%}" for j in jobs)
+        self.status_label.config(text=text)
 
-        shape.x, shape.y = spawn
+    def cancel_jobs(self):
+        self.jobs.cancel_all()
 
-        if isinstance(shape, RectangleShape):
-            if shape.x + shape.width > self.room_width or shape.y + shape.height > self.room_height:
-                messagebox.showerror("Trop grand", "Ce rectangle ne rentre pas dans la pièce.")
-                return
-        elif isinstance(shape, CircleShape):
-            if shape.x < 0 or shape.y < 0 or shape.x + 2 * shape.radius > self.room_width or shape.y + 2 * shape.radius > self.room_height:
-                messagebox.showerror("Trop grand", "Ce cercle ne rentre pas dans la pièce.")
-                return
-        else:  # TriangleShape
-            verts = shape.get_vertices()
-            xs = [px for (px, _) in verts]
-            ys = [py for (_, py) in verts]
-            if min(xs) < 0 or min(ys) < 0 or max(xs) > self.room_width or max(ys) > self.room_height:
-                messagebox.showerror("Trop grand", "Ce triangle ne rentre pas dans la pièce.")
+    def bulk_add_shapes(self, filename=None):
+        """
+        Place tout un inventaire lu dans un fichier JSON : une liste de
+        descriptions de formes (voir packing.shape_from_spec).
+        """
+        if filename is None:
+            filename = filedialog.askopenfilename(
+                title="Inventaire", filetypes=[("JSON", "*.json"), ("Tous les fichiers", "*.*")]
+            )
+            if not filename:
                 return
 
-        self.shape_group.add(shape)
-        self.redraw()
+        try:
+            with open(filename, encoding="utf-8") as f:
+                shapes = [shape_from_spec(spec) for spec in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            messagebox.showerror("Inventaire invalide", str(error))
+            return
+
+        # Remplissage calculé sur des copies, dans un instantané de la pièce ;
+        # les poses obtenues sont ensuite appliquées aux vraies formes.
+        snapshot = self.room.snapshot()
+        copies = [shape_from_record(shape_to_record(shape), shape.name) for shape in shapes]
+
+        def pack(job):
+            placed, _ = snapshot.pack(copies, job.report)
+            index = {copy: i for i, copy in enumerate(copies)}
+            return [(index[copy], *shape_to_record(copy)[1:3], shape_to_record(copy)[5]) for copy in placed]
+
+        def apply(poses):
+            placed = []
+            with self.room.history.batch():  # un seul « annuler » pour tout le lot
+                for i, x, y, angle in poses:
+                    shape = shapes[i]
+                    if self.room.is_rotatable(shape):
+                        shape.angle = angle
+                    try:
+                        self.room.place(shape, (x, y))
+                    except LayoutError:
+                        continue  # emplacement occupé entre-temps
+                    self.view.refresh(shape)
+                    placed.append(shape)
+            self.update_area_label()
+
+            placed_set = set(placed)
+            unplaced = [shape for shape in shapes if shape not in placed_set]
+            report = f"{len(placed)} forme(s) placée(s) sur {len(shapes)}."
+            if unplaced:
+                report += "\n\nNon placées :\n" + "\n".join(f" - {shape.name}" for shape in unplaced)
+            messagebox.showinfo("Placement en lot", report)
+
+        self._run_job(
+            "Placement en lot", pack, on_done=apply,
+            on_error=lambda error: messagebox.showerror("Erreur", str(error)),
+        )
+
+    @staticmethod
+    def _error_title(error):
+        if isinstance(error, AreaLimitExceeded):
+            return "Surface limit exceeded"
+        if isinstance(error, NoFreeSpace):
+            return "Aucun emplacement libre"
+        if isinstance(error, ShapeTooLarge):
+            return "Trop grand"
+        return "Erreur"
 
     def delete_shape(self):
         if self.selected_shape:
-            self.shape_group.remove(self.selected_shape)
+            self.room.remove(self.selected_shape)
+            self.view.erase(self.selected_shape)
             self.selected_shape = None
             self.detail_label.config(text="Aucune forme sélectionnée")
-            self.redraw()
+            self.update_area_label()
+
+    def undo(self):
+        self._show_history_change(self.room.undo())
+
+    def redo(self):
+        self._show_history_change(self.room.redo())
+
+    def _show_history_change(self, shapes):
+        for shape in shapes:
+            self.view.refresh(shape)  # effacée si elle n'est plus dans la pièce
+        if self.selected_shape is not None and self.selected_shape.group is None:
+            self.selected_shape = None
+            self.detail_label.config(text="Aucune forme sélectionnée")
+        elif self.selected_shape in shapes:
+            self.show_shape_details(self.selected_shape)
+        self.update_area_label()
 
     def rotate_shape(self):
         """
@@ -290,7 +545,7 @@ class SpacePlannerApp:
             messagebox.showwarning("Sélectionnez une forme", "Aucune forme sélectionnée à faire pivoter.")
             return
 
-        if not isinstance(self.selected_shape, (RectangleShape, TriangleShape)):
+        if not self.room.is_rotatable(self.selected_shape):
             messagebox.showinfo("Rotation impossible", "Seuls les rectangles et triangles peuvent être tournés.")
             return
 
@@ -301,21 +556,16 @@ class SpacePlannerApp:
             return
 
         shape = self.selected_shape
-        old_angle = shape.angle
-        shape.angle = (shape.angle + angle) % 360
-
-        can_rotate = shape.move_to(
-            shape.x, shape.y, self.room_width, self.room_height, self.shape_group.children
-        )
-        if not can_rotate:
-            shape.angle = old_angle
-            messagebox.showerror(
-                "Rotation impossible",
-                "La forme ne peut pas être tournée ici (collision ou hors pièce)."
-            )
+        try:
+            if self.fit_rotation.get():
+                self.room.rotate_and_fit(shape, angle)
+            else:
+                self.room.rotate(shape, angle)
+        except LayoutError as error:
+            messagebox.showerror("Rotation impossible", str(error))
             return
 
-        self.redraw()
+        self.view.refresh(shape)
         self.show_shape_details(shape)
 
     def calculate_area(self):
@@ -323,9 +573,9 @@ class SpacePlannerApp:
         self.shape_group.accept(visitor)
         total = visitor.get_total_area()
         details = visitor.get_details()
-        remaining = self.room_width * self.room_height - total
+        remaining = self.room.area - total
 
-        report = f"Room area: {self.room_width * self.room_height:.2f} units²\n\n"
+        report = f"Room area: {self.room.area:.2f} units²\n\n"
         report += "Shapes:\n"
         for name, area in details:
             report += f" - {name}: {area:.2f} units²\n"
@@ -333,120 +583,76 @@ class SpacePlannerApp:
         report += f"Remaining area: {remaining:.2f} units²"
 
         messagebox.showinfo("Area Details", report)
-        self.redraw()
+        self.update_area_label()
 
-    def export_canvas_to_png(self, filename="room.png"):
-        img = Image.new("RGB", (self.room_width, self.room_height), "#f0e6d6")
-        draw = ImageDraw.Draw(img)
-        try:
-            font = ImageFont.truetype("arial.ttf", 14)
-        except:
-            font = ImageFont.load_default()
-
-        for shape in self.shape_group.children:
-            if isinstance(shape, RectangleShape):
-                corners = shape.get_corners()
-                coords = []
-                for (px, py) in corners:
-                    coords.extend([px, py])
-                draw.polygon(coords, fill=shape.color, outline="black")
-                cx, cy = shape.get_center()
-                draw.text((cx, cy), shape.name, fill="black", font=font, anchor="mm")
-
-            elif isinstance(shape, CircleShape):
-                r = shape.radius
-                draw.ellipse(
-                    [shape.x, shape.y, shape.x + 2 * r, shape.y + 2 * r],
-                    fill=shape.color
-                )
-                draw.text((shape.x + r, shape.y + r), shape.name, fill="black", font=font, anchor="mm")
-
-            elif isinstance(shape, TriangleShape):
-                verts = shape.get_vertices()
-                coords = []
-                for (px, py) in verts:
-                    coords.extend([px, py])
-                draw.polygon(coords, fill=shape.color, outline="black")
-                cx, cy = shape.get_center()
-                draw.text((cx, cy), shape.name, fill="black", font=font, anchor="mm")
-
-        img.save(filename)
+    def export_canvas_to_png(self, filename="room.png", scale=1):
+        """
+        Exporte la pièce en PNG en arrière-plan, à partir d'un instantané ;
+        `scale` agrandit l'image (pixels par unité de la pièce).
+        """
+        snapshot = self.room.snapshot()
+        self._run_job(
+            "Export PNG",
+            lambda job: export_png(
+                snapshot.shapes, snapshot.width, snapshot.height, filename, job.report, scale=scale
+            ),
+            on_error=lambda error: messagebox.showerror("Export impossible", str(error)),
+        )
 
-    def find_spawn_position(self, shape):
-        pas = 1
+    def export_to_svg(self, filename="room.svg"):
+        """
+        Exporte la pièce en SVG (vectoriel) en arrière-plan, à partir d'un instantané.
+        """
+        snapshot = self.room.snapshot()
+        self._run_job(
+            "Export SVG",
+            lambda job: export_svg(snapshot.shape_group, snapshot.width, snapshot.height, filename, job.report),
+            on_error=lambda error: messagebox.showerror("Export impossible", str(error)),
+        )
 
-        if isinstance(shape, RectangleShape):
-            base_w, base_h = shape.width, shape.height
-            base_angle = shape.angle
-            max_x_possible = self.room_width - base_w
-            max_y_possible = self.room_height - base_h
-            if max_x_possible < 0 or max_y_possible < 0:
-                return None
+    _LAYOUT_TYPES = [("Plan binaire", "*.spl"), ("JSON", "*.json")]
 
-        elif isinstance(shape, CircleShape):
-            base_r = shape.radius
-            max_x_possible = self.room_width - 2 * base_r
-            max_y_possible = self.room_height - 2 * base_r
-            if max_x_possible < 0 or max_y_possible < 0:
-                return None
+    def save_layout(self, filename=None):
+        if filename is None:
+            filename = filedialog.asksaveasfilename(
+                title="Enregistrer le plan", defaultextension=".spl", filetypes=self._LAYOUT_TYPES
+            )
+            if not filename:
+                return
+        try:
+            layout_io.save(self.room, filename)
+        except OSError as error:
+            messagebox.showerror("Enregistrement impossible", str(error))
 
-        else:  # TriangleShape
-            base_b, base_h = shape.base, shape.height
-            base_angle = shape.angle
-            max_x_possible = self.room_width
-            max_y_possible = self.room_height
-
-        for y in range(0, max_y_possible + 1, pas):
-            for x in range(0, max_x_possible + 1, pas):
-                if isinstance(shape, RectangleShape):
-                    temp = RectangleShape(
-                        name=shape.name + "_tmp",
-                        x=x, y=y,
-                        width=base_w, height=base_h,
-                        color=shape.color,
-                        angle=base_angle
-                    )
-                    corners = temp.get_corners()
-                    xs = [px for (px, _) in corners]
-                    ys = [py for (_, py) in corners]
-                    if min(xs) < 0 or min(ys) < 0 or max(xs) > self.room_width or max(ys) > self.room_height:
-                        continue
-
-                elif isinstance(shape, CircleShape):
-                    temp = CircleShape(
-                        name=shape.name + "_tmp",
-                        x=x, y=y,
-                        radius=base_r,
-                        color=shape.color
-                    )
-                    if x < 0 or y < 0 or x + 2 * base_r > self.room_width or y + 2 * base_r > self.room_height:
-                        continue
-
-                else:  # TriangleShape
-                    temp = TriangleShape(
-                        name=shape.name + "_tmp",
-                        x=x, y=y,
-                        base=shape.base,
-                        height=shape.height,
-                        color=shape.color,
-                        angle=shape.angle
-                    )
-                    verts = temp.get_vertices()
-                    xs = [px for (px, _) in verts]
-                    ys = [py for (_, py) in verts]
-                    if min(xs) < 0 or min(ys) < 0 or max(xs) > self.room_width or max(ys) > self.room_height:
-                        continue
-
-                collision = False
-                for existing in self.shape_group.children:
-                    if temp.intersects_with(existing) or existing.intersects_with(temp):
-                        collision = True
-                        break
-
-                if not collision:
-                    return (x, y)
-
-        return None
+    def open_layout(self, filename=None):
+        """
+        Remplace la pièce courante par un plan enregistré, vérifié en une passe.
+        """
+        if filename is None:
+            filename = filedialog.askopenfilename(title="Ouvrir un plan", filetypes=self._LAYOUT_TYPES)
+            if not filename:
+                return
+        try:
+            room = layout_io.load(
+                filename, check=True,
+                raster_resolution=self.room.occupancy.resolution if self.room.occupancy else None,
+                workers=self.room.workers,
+            )
+        except (OSError, ValueError, KeyError, TypeError, LayoutError) as error:
+            messagebox.showerror("Plan invalide", str(error))
+            return
+
+        self.room = room
+        self.room_width = room.width
+        self.room_height = room.height
+        self.room_area = room.area
+        self.shape_group = room.shape_group
+        self.selected_shape = None
+        self.detail_label.config(text="Aucune forme sélectionnée")
+        self.redraw()
+
+    def find_spawn_position(self, shape):
+        return self.room.find_spawn_position(shape)
 
     def show_shape_details(self, shape):
         """
@@ -454,20 +660,20 @@ class SpacePlannerApp:
         """
         if isinstance(shape, RectangleShape):
             stype = "Rectangle"
-            dims = f"Width={shape.width}, Height={shape.height}"
-            angle = shape.angle
+            dims = f"Width={shape.width:g}, Height={shape.height:g}"
+            angle = f"{shape.angle:g}"
             area = shape.width * shape.height
 
         elif isinstance(shape, CircleShape):
             stype = "Circle"
-            dims = f"Radius={shape.radius}"
+            dims = f"Radius={shape.radius:g}"
             angle = "N/A"
             area = 3.1416 * shape.radius ** 2
 
         else:  # TriangleShape
             stype = "Triangle"
-            dims = f"Base={shape.base}, Height={shape.height}"
-            angle = shape.angle
+            dims = f"Base={shape.base:g}, Height={shape.height:g}"
+            angle = f"{shape.angle:g}"
             area = (shape.base * shape.height) / 2
 
         detail_text = (
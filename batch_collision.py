@@ -0,0 +1,223 @@
+import numpy as np
+
+from shape import RectangleShape, CircleShape, TriangleShape
+from store import RECTANGLE, CIRCLE, TRIANGLE, OTHER
+
+# Taille maximale (en éléments) des tableaux intermédiaires d'un bloc de paires
+_CHUNK_ELEMENTS = 4_000_000
+
+
+class ShapeArrays:
+    """
+    Formes empilées en tableaux : type, sommets (4 par forme, le premier
+    sommet d'un triangle est répété), normales d'arêtes (telles que
+    get_axes() les renvoie, complétées par des zéros), centre et rayon.
+    Les valeurs proviennent du cache de géométrie de chaque forme.
+    """
+
+    def __init__(self, shapes):
+        n = len(shapes)
+        self.kind = np.full(n, OTHER, dtype=np.int8)
+        self.verts = np.zeros((n, 4, 2))
+        self.axes = np.zeros((n, 4, 2))
+        self.naxes = np.zeros(n, dtype=np.int8)
+        self.center = np.zeros((n, 2))
+        self.radius = np.zeros(n)
+
+        for i, shape in enumerate(shapes):
+            if isinstance(shape, CircleShape):
+                self.kind[i] = CIRCLE
+                self.center[i] = shape.get_center()
+                self.radius[i] = shape.radius
+                continue
+            if isinstance(shape, RectangleShape):
+                self.kind[i] = RECTANGLE
+                verts = shape.get_corners()
+            elif isinstance(shape, TriangleShape):
+                self.kind[i] = TRIANGLE
+                verts = shape.get_vertices()
+                verts = verts + verts[:1]
+            else:
+                continue
+            self.verts[i] = verts
+            axes = shape.get_axes()
+            self.naxes[i] = len(axes)
+            if axes:
+                self.axes[i, :len(axes)] = axes
+
+    def __len__(self):
+        return len(self.kind)
+
+    def translated(self, offsets):
+        """
+        Copies de la forme unique de ce tableau, décalées de chacun des
+        vecteurs `offsets` (tableau (n, 2)) ; les normales sont inchangées.
+        """
+        sub = self.take(np.zeros(len(offsets), dtype=np.intp))
+        sub.verts = sub.verts + offsets[:, np.newaxis, :]
+        sub.center = sub.center + offsets
+        return sub
+
+    def take(self, index):
+        sub = ShapeArrays.__new__(ShapeArrays)
+        for name in ("kind", "verts", "axes", "naxes", "center", "radius"):
+            setattr(sub, name, getattr(self, name)[index])
+        return sub
+
+
+def _as_arrays(shapes):
+    return shapes if isinstance(shapes, ShapeArrays) else ShapeArrays(shapes)
+
+
+def _separated(axes, axis_mask, verts_a, verts_b):
+    """
+    Vrai si l'un des axes valides sépare les deux polygones
+    (projections calculées comme _project_onto_axis).
+    """
+    ax = axes[..., :, 0:1]
+    ay = axes[..., :, 1:2]
+    proj_a = verts_a[..., np.newaxis, :, 0] * ax + verts_a[..., np.newaxis, :, 1] * ay
+    proj_b = verts_b[..., np.newaxis, :, 0] * ax + verts_b[..., np.newaxis, :, 1] * ay
+    min1, max1 = proj_a.min(axis=-1), proj_a.max(axis=-1)
+    min2, max2 = proj_b.min(axis=-1), proj_b.max(axis=-1)
+    return (((max1 < min2) | (max2 < min1)) & axis_mask).any(axis=-1)
+
+
+def _polygons_collide(a, b):
+    """
+    SAT entre les polygones a[k] et b[k] de chaque paire, avec les mêmes
+    ensembles d'axes que intersects_with : un rectangle n'apporte que ses
+    deux premières normales s'il est la forme appelante, ou si les deux
+    formes sont des rectangles.
+    """
+    slots = np.arange(4)
+    a_rect = a.kind == RECTANGLE
+    limit_a = np.where(a_rect, np.minimum(a.naxes, 2), a.naxes)
+    limit_b = np.where(a_rect & (b.kind == RECTANGLE), np.minimum(b.naxes, 2), b.naxes)
+    sep = _separated(a.axes, slots < limit_a[:, np.newaxis], a.verts, b.verts)
+    sep |= _separated(b.axes, slots < limit_b[:, np.newaxis], a.verts, b.verts)
+    return ~sep
+
+
+def _polygon_circle(poly, circle):
+    """
+    Reprend pas à pas le test polygone / cercle de intersects_with
+    (centre contenu, distance aux arêtes, distance aux sommets).
+    `poly` et `circle` sont des ShapeArrays alignés (une paire par indice).
+    """
+    verts = poly.verts
+    cx = circle.center[..., 0]
+    cy = circle.center[..., 1]
+    r_sq = circle.radius * circle.radius
+    x = verts[..., 0]
+    y = verts[..., 1]
+
+    # Centre dans un rectangle : signes des aires orientées
+    x1, y1 = x, y
+    x2, y2 = np.roll(x, -1, axis=-1), np.roll(y, -1, axis=-1)
+    signs = (x2 - x1) * (cy[..., np.newaxis] - y1) - (y2 - y1) * (cx[..., np.newaxis] - x1)
+    inside_rect = (signs >= 0).all(axis=-1) | (signs <= 0).all(axis=-1)
+
+    # Centre dans un triangle : somme des aires
+    def area(xa, ya, xb, yb, xc, yc):
+        return np.abs((xa * (yb - yc) + xb * (yc - ya) + xc * (ya - yb))) / 2
+
+    tx1, ty1, tx2, ty2, tx3, ty3 = x[..., 0], y[..., 0], x[..., 1], y[..., 1], x[..., 2], y[..., 2]
+    a_tot = area(tx1, ty1, tx2, ty2, tx3, ty3)
+    a1 = area(cx, cy, tx2, ty2, tx3, ty3)
+    a2 = area(tx1, ty1, cx, cy, tx3, ty3)
+    a3 = area(tx1, ty1, tx2, ty2, cx, cy)
+    inside_tri = np.abs((a1 + a2 + a3) - a_tot) < 1e-6
+
+    inside = np.where(poly.kind == RECTANGLE, inside_rect, inside_tri)
+
+    # Distance du centre à chaque arête (les arêtes de longueur nulle sont ignorées)
+    dx = x2 - x1
+    dy = y2 - y1
+    length_sq = dx * dx + dy * dy
+    valid = length_sq != 0
+    safe = np.where(valid, length_sq, 1)
+    ccx = cx[..., np.newaxis]
+    ccy = cy[..., np.newaxis]
+    t = ((ccx - x1) * dx + (ccy - y1) * dy) / safe
+    t = np.maximum(0, np.minimum(1, t))
+    proj_x = x1 + t * dx
+    proj_y = y1 + t * dy
+    dist_sq = (ccx - proj_x) ** 2 + (ccy - proj_y) ** 2
+    near_edge = (valid & (dist_sq <= r_sq[..., np.newaxis])).any(axis=-1)
+
+    d_sq = (ccx - x) ** 2 + (ccy - y) ** 2
+    near_vertex = (d_sq <= r_sq[..., np.newaxis]).any(axis=-1)
+
+    return inside | near_edge | near_vertex
+
+
+def _pair_block(a, b, mask=None):
+    """
+    Résultats (N, M) pour un bloc de formes appelantes `a` et d'obstacles `b` :
+    les paires sont regroupées par combinaison de types et chaque groupe est
+    traité par un seul calcul vectorisé. Seules les paires où `mask` est
+    vrai sont évaluées (les autres valent False).
+    """
+    a_kind = a.kind[:, np.newaxis]
+    b_kind = b.kind[np.newaxis, :]
+    a_poly = (a_kind == RECTANGLE) | (a_kind == TRIANGLE)
+    b_poly = (b_kind == RECTANGLE) | (b_kind == TRIANGLE)
+    a_circ = a_kind == CIRCLE
+    b_circ = b_kind == CIRCLE
+    if mask is not None:
+        a_poly = a_poly & mask
+        a_circ = a_circ & mask
+
+    result = np.zeros((len(a), len(b)), dtype=bool)
+
+    ii, jj = np.nonzero(a_poly & b_poly)
+    if len(ii):
+        result[ii, jj] = _polygons_collide(a.take(ii), b.take(jj))
+
+    ii, jj = np.nonzero(a_poly & b_circ)
+    if len(ii):
+        result[ii, jj] = _polygon_circle(a.take(ii), b.take(jj))
+
+    # Cercle appelant : intersects_with délègue au polygone
+    ii, jj = np.nonzero(a_circ & b_poly)
+    if len(ii):
+        result[ii, jj] = _polygon_circle(b.take(jj), a.take(ii))
+
+    ii, jj = np.nonzero(a_circ & b_circ)
+    if len(ii):
+        c1, c2 = a.take(ii), b.take(jj)
+        dx = c1.center[:, 0] - c2.center[:, 0]
+        dy = c1.center[:, 1] - c2.center[:, 1]
+        dist_sq = dx * dx + dy * dy
+        result[ii, jj] = dist_sq <= (c1.radius + c2.radius) ** 2
+
+    return result
+
+
+def collide_matrix(candidates, obstacles, mask=None):
+    """
+    Matrice booléenne (N, M) : [i, j] vaut candidates[i].intersects_with(obstacles[j]),
+    contact compris, calculée en une série d'opérations vectorisées.
+    Accepte des listes de formes ou des ShapeArrays déjà construits.
+    `mask` (N, M) restreint le calcul aux paires retenues par une phase
+    large (les autres sont à False).
+    """
+    a = _as_arrays(candidates)
+    b = _as_arrays(obstacles)
+    result = np.zeros((len(a), len(b)), dtype=bool)
+    if len(a) == 0 or len(b) == 0:
+        return result
+    rows = max(1, _CHUNK_ELEMENTS // (len(b) * 16))
+    for start in range(0, len(a), rows):
+        stop = min(len(a), start + rows)
+        block_mask = None if mask is None else mask[start:stop]
+        result[start:stop] = _pair_block(a.take(slice(start, stop)), b, block_mask)
+    return result
+
+
+def collide_one(shape, shapes):
+    """
+    Tableau booléen (M,) : shape.intersects_with(shapes[j]) pour chaque j.
+    """
+    return collide_matrix([shape], shapes)[0]
@@ -0,0 +1,271 @@
+"""
+Mesures de performance des chemins critiques, sans interface graphique.
+
+    python benchmark.py                            # affiche les résultats
+    python benchmark.py -o mesures.json            # les enregistre en JSON
+    python benchmark.py --baseline reference.json  # compare à une référence
+
+Les pièces sont générées avec une graine fixe : deux exécutions mesurent
+exactement le même travail. Chaque mesure est le meilleur temps par
+opération sur plusieurs répétitions. Avec --baseline, le code de sortie
+vaut 1 si une mesure est plus lente que la référence au-delà du seuil.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from shape import RectangleShape, CircleShape, TriangleShape
+from collision_cache import collision_cache
+from visitor import AreaCalculatorVisitor
+from room import RoomModel
+
+CELL = 50  # côté d'une case de la grille de génération
+KINDS = ("rect", "tri", "circle")
+
+
+def random_shape(rng, kind, name, cx, cy, size):
+    """
+    Forme aléatoire de type `kind` dont la boîte englobante est centrée
+    sur (cx, cy) et tient dans un carré de côté `size`.
+    """
+    d = size * 0.6
+    if kind == "rect":
+        shape = RectangleShape(name, 0, 0, rng.uniform(0.3, 1) * d, rng.uniform(0.3, 1) * d,
+                               "#a0c4ff", angle=rng.choice((0, 0, 90, rng.uniform(0, 360))))
+    elif kind == "tri":
+        shape = TriangleShape(name, 0, 0, rng.uniform(0.3, 1) * d, rng.uniform(0.3, 1) * d,
+                              "#ffc6a0", angle=rng.choice((0, 0, 180, rng.uniform(0, 360))))
+    else:
+        shape = CircleShape(name, 0, 0, rng.uniform(0.15, 0.5) * d, "#b9fbc0")
+    min_x, min_y, max_x, max_y = shape.get_bbox()
+    shape.x += cx - (min_x + max_x) / 2
+    shape.y += cy - (min_y + max_y) / 2
+    return shape
+
+
+def make_room(count, density, seed):
+    """
+    Pièce carrée découpée en cases de CELL unités, dont une fraction
+    `density` porte chacune une forme : `count` formes sans chevauchement.
+    """
+    rng = random.Random(seed)
+    cols = max(1, math.ceil(math.sqrt(count / density)))
+    room = RoomModel(cols * CELL, cols * CELL)
+    cells = rng.sample(range(cols * cols), count)
+    room.shape_group.add_many([
+        random_shape(rng, rng.choice(KINDS), f"s{i}",
+                     (cell % cols + 0.5) * CELL, (cell // cols + 0.5) * CELL, CELL)
+        for i, cell in enumerate(cells)
+    ])
+    return room
+
+
+def full_room(count, seed):
+    """
+    Pièce dont chaque case porte une forme (au moins `count` formes) : un
+    carré de 2 × CELL y recouvre toujours une case entière, et n'a donc
+    aucune place.
+    """
+    cols = max(2, math.ceil(math.sqrt(count)))
+    return make_room(cols * cols, 1.0, seed)
+
+
+def measure(run, ops, repeat, setup=None):
+    """
+    Meilleur temps par opération (secondes) de `run` sur `repeat` essais ;
+    `setup`, s'il est donné, prépare chaque essai (non chronométré) et son
+    résultat est passé à `run`.
+    """
+    best = math.inf
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        collision_cache.clear()
+        start = time.perf_counter()
+        run(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / ops
+
+
+# --- Mesures ---
+
+def bench_intersects(seed, repeat, pairs=2000):
+    """
+    a.intersects_with(b) pour chaque couple de types, sur des paires proches
+    (environ la moitié se touchent), sans passer par le cache de collisions.
+    """
+    results = {}
+    for a in KINDS:
+        for b in KINDS:
+            rng = random.Random(seed)
+            shapes = [
+                (random_shape(rng, a, "a", 0, 0, CELL),
+                 random_shape(rng, b, "b", rng.uniform(-CELL, CELL) * 0.6, rng.uniform(-CELL, CELL) * 0.6, CELL))
+                for _ in range(pairs)
+            ]
+            for first, second in shapes:
+                first.get_bbox(), second.get_bbox()  # géométrie en cache : seul le test est mesuré
+
+            def run():
+                for first, second in shapes:
+                    first.intersects_with(second)
+
+            results[f"intersects/{a}-{b}"] = measure(run, pairs, repeat)
+    return results
+
+
+def bench_room(count, seed, repeat, moves=500):
+    results = {}
+    size = f"n={count}"
+
+    def moved_room():
+        room = make_room(count, 0.6, seed)
+        rng = random.Random(seed)
+        picks = [(shape, rng.uniform(-5, 5), rng.uniform(-5, 5))
+                 for shape in rng.sample(room.shapes, min(moves, count))]
+        return room, picks
+
+    def run_moves(prepared):
+        room, picks = prepared
+        for shape, dx, dy in picks:
+            shape.move_to(shape.x + dx, shape.y + dy, room.width, room.height, room.shape_group)
+
+    results[f"move_to/{size}"] = measure(run_moves, min(moves, count), repeat, moved_room)
+
+    crowded = make_room(count, 0.9, seed)
+    probe = RectangleShape("probe", 0, 0, CELL * 0.6, CELL * 0.6, "#a0c4ff")
+    results[f"spawn_crowded/{size}"] = measure(
+        lambda: crowded.find_spawn_position(probe), 1, repeat
+    )
+    tilted = RectangleShape("probe", 0, 0, CELL * 0.6, CELL * 0.3, "#a0c4ff", angle=30)
+    results[f"spawn_crowded_rotated/{size}"] = measure(
+        lambda: crowded.find_spawn_position(tilted), 1, repeat
+    )
+
+    # Aucune place : balayage complet de la pièce. Le carré tourné de
+    # 3 × CELL contient un carré droit de plus de 2 × CELL.
+    full = full_room(count, seed)
+    big = RectangleShape("probe", 0, 0, 2 * CELL, 2 * CELL, "#a0c4ff")
+    big_tilted = RectangleShape("probe", 0, 0, 3 * CELL, 3 * CELL, "#a0c4ff", angle=30)
+    results[f"spawn_full/{size}"] = measure(lambda: full.find_spawn_position(big), 1, repeat)
+    results[f"spawn_full_rotated/{size}"] = measure(
+        lambda: full.find_spawn_position(big_tilted), 1, repeat
+    )
+
+    room = make_room(count, 0.6, seed)
+
+    def traverse():
+        visitor = AreaCalculatorVisitor()
+        room.shape_group.accept(visitor)
+        return visitor.get_total_area()
+
+    results[f"visitor/{size}"] = measure(traverse, 1, repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            from export import export_png
+        except ImportError:
+            pass  # Pillow absent : pas de mesure d'export PNG
+        else:
+            results[f"export_png/{size}"] = measure(
+                lambda: export_png(room.shapes, room.width, room.height, os.path.join(tmp, "room.png")),
+                1, repeat,
+            )
+        from svg import export_svg
+        results[f"export_svg/{size}"] = measure(
+            lambda: export_svg(room.shape_group, room.width, room.height, os.path.join(tmp, "room.svg")),
+            1, repeat,
+        )
+    return results
+
+
+def run_all(sizes, seed, repeat):
+    results = bench_intersects(seed, repeat)
+    empty = RoomModel(2000, 2000)
+    probe = RectangleShape("probe", 0, 0, 30, 30, "#a0c4ff")
+    results["spawn_empty"] = measure(lambda: empty.find_spawn_position(probe), 1, repeat)
+    for count in sizes:
+        results.update(bench_room(count, seed, repeat))
+    return results
+
+
+# --- Comparaison ---
+
+def compare(results, baseline, threshold):
+    """
+    Lignes de comparaison avec une référence, liste des mesures plus lentes
+    que `threshold` fois la référence, et liste des mesures présentes d'un
+    seul côté (nouvelles ou disparues).
+    """
+    lines, regressions, missing = [], [], []
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            missing.append(name)
+            lines.append(f"{name:<28} {seconds * 1e6:12.2f} µs   MANQUANTE dans la référence")
+            continue
+        ratio = seconds / reference
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  RÉGRESSION"
+        lines.append(f"{name:<28} {seconds * 1e6:12.2f} µs   x{ratio:.2f}{flag}")
+    for name in baseline:
+        if name not in results:
+            missing.append(name)
+            lines.append(f"{name:<28} {'-':>12}      MANQUANTE dans les résultats")
+    return lines, regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les performances de Space Planner.")
+    parser.add_argument("--sizes", default="100,1000,5000",
+                        help="nombres de formes des pièces générées (séparés par des virgules)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="essais par mesure (le meilleur est gardé)")
+    parser.add_argument("-o", "--output", help="fichier JSON où enregistrer les résultats")
+    parser.add_argument("--baseline", help="résultats JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="rapport au-delà duquel une mesure est une régression (défaut 1.2)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run_all(sizes, args.seed, args.repeat)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "sizes": sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,  # secondes par opération
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline is None:
+        for name, seconds in results.items():
+            print(f"{name:<28} {seconds * 1e6:12.2f} µs")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    lines, regressions, missing = compare(results, baseline, args.threshold)
+    print("\n".join(lines))
+    if missing:
+        print(f"{len(missing)} mesure(s) sans correspondance : {', '.join(missing)}", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de x{args.threshold}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+
+class CollisionCache:
+    """
+    Cache LRU borné des résultats du test exact (phase étroite).
+
+    La clé d'un résultat est formée des numéros de version des deux formes :
+    un numéro identifie un état géométrique d'une forme précise (le compteur
+    est global), donc toute modification de position, de dimension ou
+    d'angle rend l'ancienne entrée inaccessible sans invalidation explicite.
+    Un déplacement refusé restaure la version précédente (Shape._restore) et
+    retrouve donc ses résultats en cache.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key, compute):
+        entries = self.entries
+        result = entries.get(key)
+        if result is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = compute()
+        if self.maxsize > 0:
+            entries[key] = result
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return result
+
+    def intersects(self, shape, other):
+        """
+        shape.intersects_with(other), avec mise en cache.
+        """
+        return self._lookup(
+            (shape.version, other.version),
+            lambda: shape.intersects_with(other),
+        )
+
+    def collides(self, shape, other):
+        """
+        Collision testée dans les deux sens (shape → other, puis other → shape) ;
+        le résultat est symétrique et partage une seule entrée.
+        """
+        a, b = sorted((shape.version, other.version))
+        return self._lookup(
+            (-a, b),  # clé négative : distincte des entrées d'intersects
+            lambda: shape.intersects_with(other) or other.intersects_with(shape),
+        )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.entries),
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Cache partagé par les tests de collision de shape.py et placement.py
+collision_cache = CollisionCache()
@@ -0,0 +1,159 @@
+import contextlib
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from shape import CircleShape
+from spatial import SpatialGrid
+
+BACKGROUND = "#f0e6d6"
+FONT_SIZE = 14
+
+
+@lru_cache(maxsize=None)
+def _font(size):
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _primitives(shapes):
+    """
+    Ce qu'il faut dessiner pour chaque forme, calculé une fois avant le
+    rendu : (ellipse ?, coordonnées à plat, centre, nom, couleur, boîte).
+    Les bandes ne lisent ensuite que ces tuples.
+    """
+    return [
+        (isinstance(shape, CircleShape), tuple(shape._canvas_coords()), shape.get_center(),
+         shape.name, shape.color, shape.get_bbox())
+        for shape in shapes
+    ]
+
+
+def _render_strip(items, scale, width, top, rows, font):
+    """
+    Bande de `rows` lignes de pixels commençant à la ligne `top`, sous forme
+    de lignes PNG (octet de filtre 0 puis pixels RGB) compressées en un
+    bloc deflate brut indépendant. Renvoie (données, adler32, longueur brute).
+    """
+    img = Image.new("RGB", (width, rows), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    for ellipse, coords, (cx, cy), name, color, _ in items:
+        # Arrondi au pixel avant le décalage de la bande : chaque bande est une
+        # translation entière exacte de l'image complète (pas de raccord visible)
+        points = [round(v * scale) - (top if i % 2 else 0) for i, v in enumerate(coords)]
+        if ellipse:
+            draw.ellipse(points, fill=color)
+        else:
+            draw.polygon(points, fill=color, outline="black")
+        draw.text((cx * scale, cy * scale - top), name, fill="black", font=font, anchor="mm")
+
+    raw = img.tobytes()
+    stride = 3 * width
+    raw = b"".join(b"\0" + raw[i:i + stride] for i in range(0, len(raw), stride))
+    # Vidage synchronisé : les blocs des bandes se concatènent en un seul flux
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    data = compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(raw), len(raw)
+
+
+def _adler32_combine(adler1, adler2, len2):
+    # Somme adler32 de A + B à partir de celles de A et de B (comme zlib)
+    mod = 65521
+    a1, b1 = adler1 & 0xFFFF, adler1 >> 16
+    a2, b2 = adler2 & 0xFFFF, adler2 >> 16
+    a = (a1 + a2 - 1) % mod
+    b = (b1 + b2 + len2 * (a1 - 1)) % mod
+    return (b << 16) | a
+
+
+def _write_chunk(f, tag, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(tag)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+
+def export_png(shapes, width, height, filename, progress=None, scale=1,
+               tile_pixels=1 << 22, workers=None):
+    """
+    Rend les formes dans une image PNG de la taille de la pièce multipliée
+    par `scale`. L'image est découpée en bandes horizontales d'environ
+    `tile_pixels` pixels, rendues en parallèle par `workers` threads ; chaque
+    bande ne dessine que les formes dont la boîte (agrandie de la hauteur
+    du texte) la coupe. Chaque bande est aussi compressée par son thread ;
+    les blocs sont écrits dans le fichier au fur et à mesure, dans l'ordre :
+    l'image entière n'est jamais en mémoire.
+
+    `progress`, s'il est donné, reçoit la fraction de bandes écrites (et
+    peut lever une exception pour annuler l'export).
+    """
+    img_width = max(1, round(width * scale))
+    img_height = max(1, round(height * scale))
+    rows = max(1, min(img_height, tile_pixels // img_width))
+    font_size = max(1, round(FONT_SIZE * scale))
+    font = _font(font_size)
+
+    items = _primitives(shapes)
+    index = SpatialGrid(cell_size=max(1, rows / scale))
+    index.insert_many(range(len(items)), (item[5] for item in items))
+    margin = font_size / scale  # un nom peut dépasser de sa forme
+
+    def render(top):
+        n = min(rows, img_height - top)
+        y0, y1 = top / scale - margin, (top + n) / scale + margin
+        visible = sorted(index.query((0, y0, width, y1)))  # ordre d'empilement
+        return _render_strip([items[i] for i in visible], scale, img_width, top, n, font)
+
+    tops = range(0, img_height, rows)
+    workers = workers or min(8, os.cpu_count() or 1)
+    pending = deque()
+    done = 0
+    checksum = 1  # adler32 du flux zlib complet
+
+    def write_next(f):
+        nonlocal done, checksum
+        data, adler, length = pending.popleft().result()
+        _write_chunk(f, b"IDAT", data)
+        checksum = _adler32_combine(checksum, adler, length)
+        done += 1
+        if progress is not None:
+            progress(done / len(tops))
+
+    # Écriture dans un fichier temporaire voisin, puis remplacement atomique :
+    # un fichier existant n'est jamais tronqué ni supprimé en cas d'échec
+    partial = f"{filename}.{os.getpid()}-{threading.get_ident()}.part"
+    f = open(partial, "wb")
+    try:
+        with f, ThreadPoolExecutor(workers) as pool:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            _write_chunk(f, b"IHDR", struct.pack(">IIBBBBB", img_width, img_height, 8, 2, 0, 0, 0))
+            _write_chunk(f, b"IDAT", b"\x78\x9c")  # en-tête zlib
+            try:
+                # Au plus `workers` bandes d'avance : la mémoire reste bornée
+                for top in tops:
+                    pending.append(pool.submit(render, top))
+                    if len(pending) > workers:
+                        write_next(f)
+                while pending:
+                    write_next(f)
+            finally:
+                for future in pending:
+                    future.cancel()
+            # Bloc final vide, puis somme de contrôle du flux zlib
+            _write_chunk(f, b"IDAT", zlib.compressobj(6, zlib.DEFLATED, -15).flush() + struct.pack(">I", checksum))
+            _write_chunk(f, b"IEND", b"")
+        os.replace(partial, filename)
+    except BaseException:
+        # Seul le fichier temporaire de cet appel est supprimé ; l'erreur
+        # d'origine reste celle qui est levée
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+        raise
@@ -0,0 +1,194 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+
+
+def pose_of(shape):
+    """
+    Pose d'une forme : (x, y, angle), angle None pour un cercle.
+    """
+    return shape.x, shape.y, getattr(shape, "angle", None)
+
+
+def _apply_pose(shape, pose):
+    # Pose déjà validée quand elle a été enregistrée : pas de test de collision
+    x, y, angle = pose
+    shape.x, shape.y = x, y
+    if angle is not None:
+        shape.angle = angle
+    shape._recall_pose()
+    shape._moved()  # index spatial et observateurs du groupe
+
+
+class Command(ABC):
+    """
+    Opération réversible sur un ShapeGroup. Les commandes ne gardent que
+    des références aux formes et des poses : leur taille ne dépend pas de
+    celle du plan.
+    """
+
+    shapes = ()  # formes touchées, à redessiner
+
+    @abstractmethod
+    def undo(self, group):
+        pass
+
+    @abstractmethod
+    def redo(self, group):
+        pass
+
+    def merge(self, other):
+        """
+        Absorbe la commande suivante si possible (renvoie True).
+        """
+        return False
+
+
+class AddShape(Command):
+    def __init__(self, shape):
+        self.shapes = (shape,)
+        self.rank = None  # rang d'empilement, connu après la première annulation
+
+    def undo(self, group):
+        self.rank = group.remove(self.shapes[0])
+
+    def redo(self, group):
+        group.add(self.shapes[0], self.rank)
+
+
+class RemoveShape(Command):
+    """
+    Retrait d'une forme ; `rank` est son rang d'empilement (renvoyé par
+    ShapeGroup.remove), pour la remettre à sa place dans l'ordre.
+    """
+
+    def __init__(self, shape, rank):
+        self.shapes = (shape,)
+        self.rank = rank
+
+    def undo(self, group):
+        group.add(self.shapes[0], self.rank)
+
+    def redo(self, group):
+        self.rank = group.remove(self.shapes[0])
+
+
+class PoseChange(Command):
+    def __init__(self, shape, old, new):
+        self.shapes = (shape,)
+        self.old = old
+        self.new = new
+
+    def undo(self, group):
+        _apply_pose(self.shapes[0], self.old)
+
+    def redo(self, group):
+        _apply_pose(self.shapes[0], self.new)
+
+    def merge(self, other):
+        if isinstance(other, PoseChange) and other.shapes == self.shapes:
+            self.new = other.new
+            return True
+        return False
+
+
+class Batch(Command):
+    """
+    Plusieurs commandes annulées et rétablies d'un seul coup.
+    """
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.shapes = tuple(shape for command in commands for shape in command.shapes)
+
+    def undo(self, group):
+        for command in reversed(self.commands):
+            command.undo(group)
+
+    def redo(self, group):
+        for command in self.commands:
+            command.redo(group)
+
+
+class History:
+    """
+    Piles d'annulation et de rétablissement des commandes d'un ShapeGroup.
+    Enregistrer, annuler ou rétablir coûte O(1) (plus la mise à jour locale
+    de l'index et des aires par le groupe). Au-delà de `limit` entrées, les
+    plus anciennes sont oubliées.
+    """
+
+    def __init__(self, group, limit=1000):
+        self.group = group
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        self._mergeable = False
+        self._batch = None
+
+    def record(self, command, merge=False):
+        """
+        Enregistre une commande déjà effectuée. Avec `merge`, elle est fusionnée
+        dans la précédente si celle-ci a aussi été enregistrée avec `merge`
+        depuis le dernier seal() (pas successifs d'un même glisser-déposer).
+        """
+        self.redo_stack.clear()
+        if self._batch is not None:
+            self._batch.append(command)
+            return
+        if not (merge and self._mergeable and self.undo_stack[-1].merge(command)):
+            self.undo_stack.append(command)
+        self._mergeable = merge
+
+    def seal(self):
+        """
+        Termine la fusion en cours : la prochaine commande sera une nouvelle entrée.
+        """
+        self._mergeable = False
+
+    @contextmanager
+    def batch(self):
+        """
+        Regroupe les commandes enregistrées dans le bloc en une seule entrée.
+        """
+        if self._batch is not None:
+            yield
+            return
+        self._batch = []
+        try:
+            yield
+        finally:
+            commands, self._batch = self._batch, None
+            if commands:
+                self.record(Batch(commands))
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """
+        Annule la dernière entrée et la renvoie (None si la pile est vide).
+        """
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        command.undo(self.group)
+        self.redo_stack.append(command)
+        self._mergeable = False
+        return command
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        command.redo(self.group)
+        self.undo_stack.append(command)
+        self._mergeable = False
+        return command
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._mergeable = False
@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """
+    Levée dans le travail en arrière-plan quand l'utilisateur l'annule.
+    """
+
+
+class Job:
+    """
+    Travail lancé par un JobRunner. La fonction exécutée reçoit le Job et
+    appelle job.report(fraction) de temps en temps : c'est là que la
+    progression est publiée et que l'annulation est prise en compte.
+    """
+
+    def __init__(self, description):
+        self.description = description
+        self.progress = 0.0
+        self.future = None
+        self._cancel = threading.Event()
+
+    def report(self, fraction):
+        self.progress = fraction
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        self._cancel.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+
+class JobRunner:
+    """
+    Exécute les opérations lourdes dans un pool de threads, hors de la boucle
+    Tk. Les résultats, erreurs et progressions sont relevés par scrutation
+    (root.after) et les rappels sont toujours appelés dans le thread de
+    l'interface : c'est donc là, en une seule fois, que les résultats
+    s'appliquent au ShapeGroup.
+    """
+
+    def __init__(self, root, max_workers=2, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.jobs = {}  # Job -> (rappels, dernière progression signalée)
+        self._poll_job = None
+
+    def submit(self, description, func, *args, on_done=None, on_error=None, on_progress=None,
+               on_cancel=None):
+        """
+        Lance func(job, *args) en arrière-plan. on_done(résultat),
+        on_error(exception), on_progress(job) et on_cancel(job) sont appelés
+        dans le thread de l'interface ; un travail annulé n'appelle que on_cancel.
+        """
+        job = Job(description)
+        job.future = self.executor.submit(func, job, *args)
+        self.jobs[job] = (on_done, on_error, on_progress, on_cancel, None)
+        if self._poll_job is None:
+            self._poll_job = self.root.after(self.poll_ms, self._poll)
+        return job
+
+    def _poll(self):
+        self._poll_job = None
+        for job, (on_done, on_error, on_progress, on_cancel, reported) in list(self.jobs.items()):
+            if job.future.done():
+                del self.jobs[job]
+                error = None if job.future.cancelled() else job.future.exception()
+                if job.cancelled or job.future.cancelled() or isinstance(error, JobCancelled):
+                    if on_cancel is not None:
+                        on_cancel(job)
+                    continue
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                elif on_done is not None:
+                    on_done(job.future.result())
+            elif on_progress is not None and job.progress != reported:
+                self.jobs[job] = (on_done, on_error, on_progress, on_cancel, job.progress)
+                on_progress(job)
+        if self.jobs:
+            self._poll_job = self.root.after(self.poll_ms, self._poll)
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    @property
+    def busy(self):
+        return bool(self.jobs)
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
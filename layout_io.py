@@ -0,0 +1,187 @@
+import json
+import struct
+import sys
+from array import array
+
+from shape import RectangleShape, CircleShape
+from store import COLUMNS, RECTANGLE, CIRCLE, TRIANGLE
+from packing import shape_from_spec
+from room import RoomModel, LayoutError
+
+# En-tête binaire : signature, largeur, hauteur, nombre de formes
+_MAGIC = b"SPL1"
+_HEADER = struct.Struct("<4sddI")
+
+
+class InvalidLayout(LayoutError):
+    pass
+
+
+def shape_to_spec(shape):
+    """
+    Description d'une forme, inverse de packing.shape_from_spec.
+    """
+    spec = {"name": shape.name, "color": shape.color, "x": shape.x, "y": shape.y}
+    if isinstance(shape, RectangleShape):
+        spec.update(type="rectangle", width=shape.width, height=shape.height, angle=shape.angle)
+    elif isinstance(shape, CircleShape):
+        spec.update(type="circle", radius=shape.radius)
+    else:
+        spec.update(type="triangle", base=shape.base, height=shape.height, angle=shape.angle)
+    return spec
+
+
+def validate(room):
+    """
+    Vérification en une passe d'un plan chargé (surface, puis bornes et
+    collisions via RoomModel.validate_layout). Lève InvalidLayout au
+    premier problème.
+    """
+    if room.used_area() > room.area:
+        raise InvalidLayout("La surface des formes dépasse celle de la pièce.")
+    pairs, out_of_bounds = room.validate_layout()
+    if out_of_bounds:
+        raise InvalidLayout(f"La forme {out_of_bounds[0].name} sort de la pièce.")
+    if pairs:
+        first, second = pairs[0]
+        raise InvalidLayout(f"Les formes {first.name} et {second.name} se chevauchent.")
+
+
+# --- JSON ---
+
+def save_json(room, filename):
+    data = {
+        "room": {"width": room.width, "height": room.height},
+        "shapes": [shape_to_spec(shape) for shape in room.shapes],
+    }
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def layout_from_data(data, check=False, **room_options):
+    """
+    RoomModel construit à partir d'un plan déjà décodé (même structure que
+    le fichier JSON : {"room": {...}, "shapes": [...]}). Une structure
+    incorrecte lève InvalidLayout.
+    """
+    try:
+        width, height = data["room"]["width"], data["room"]["height"]
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (width, height)):
+            raise InvalidLayout("Dimensions de la pièce invalides.")
+        shapes = [shape_from_spec(spec) for spec in data["shapes"]]
+        room = RoomModel(width, height, **room_options)
+        room.shape_group.add_many(shapes)
+    except (KeyError, TypeError, ValueError, AttributeError) as error:
+        raise InvalidLayout(f"Plan mal formé ({type(error).__name__} : {error}).") from error
+    if check:
+        validate(room)
+    return room
+
+
+def load_json(filename, check=False, **room_options):
+    with open(filename, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as error:  # JSON ou UTF-8 invalide
+            raise InvalidLayout(f"Fichier de plan illisible : {error}") from error
+    return layout_from_data(data, check, **room_options)
+
+
+# --- Binaire ---
+#
+# En-tête, puis les colonnes du ShapeStore (type en int8, x, y, a, b, angle
+# en float64, little-endian, dans l'ordre de ShapeGroup.children), puis les
+# longueurs (uint32) des noms et des couleurs et leurs octets UTF-8 à la suite.
+
+def _write_array(f, data):
+    if sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    data.tofile(f)
+
+
+def _read_exact(f, size):
+    # Fichier tronqué : InvalidLayout plutôt qu'une erreur de bas niveau
+    data = f.read(size)
+    if len(data) != size:
+        raise InvalidLayout("Fichier de plan tronqué.")
+    return data
+
+
+def _read_array(f, typecode, count):
+    data = array(typecode)
+    data.frombytes(_read_exact(f, count * data.itemsize))
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data
+
+
+def save_binary(room, filename):
+    store = room.shape_group.store
+    order = [shape._row for shape in room.shapes]
+    names = [shape.name.encode("utf-8") for shape in room.shapes]
+    colors = [shape.color.encode("utf-8") for shape in room.shapes]
+
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, room.width, room.height, len(order)))
+        _write_array(f, array("b", [store.kind[row] for row in order]))
+        for name in COLUMNS:
+            column = getattr(store, name)
+            _write_array(f, array("d", [column[row] for row in order]))
+        for strings in (names, colors):
+            _write_array(f, array("I", [len(s) for s in strings]))
+            f.write(b"".join(strings))
+
+
+def _read_strings(f, count):
+    lengths = _read_array(f, "I", count)
+    raw = _read_exact(f, sum(lengths))
+    strings, pos = [], 0
+    try:
+        for n in lengths:
+            strings.append(raw[pos:pos + n].decode("utf-8"))
+            pos += n
+    except UnicodeDecodeError:
+        raise InvalidLayout("Nom ou couleur illisible dans le plan.") from None
+    return strings
+
+
+def load_binary(filename, check=False, **room_options):
+    with open(filename, "rb") as f:
+        magic, width, height, count = _HEADER.unpack(_read_exact(f, _HEADER.size))
+        if magic != _MAGIC:
+            raise InvalidLayout("Fichier de plan non reconnu.")
+        kind = _read_array(f, "b", count)
+        if not set(kind) <= {RECTANGLE, CIRCLE, TRIANGLE}:
+            raise InvalidLayout("Type de forme inconnu dans le plan.")
+        columns = [_read_array(f, "d", count) for _ in COLUMNS]
+        names = _read_strings(f, count)
+        colors = _read_strings(f, count)
+
+    width, height = (int(v) if v.is_integer() else v for v in (width, height))
+    room = RoomModel(width, height, **room_options)
+    room.shape_group.add_columns(kind, *columns, names, colors)
+    if check:
+        validate(room)
+    return room
+
+
+def save(room, filename):
+    """
+    Enregistre le plan : JSON si le nom finit par .json, binaire sinon.
+    """
+    if filename.lower().endswith(".json"):
+        save_json(room, filename)
+    else:
+        save_binary(room, filename)
+
+
+def load(filename, check=False, **room_options):
+    """
+    Charge un plan (JSON ou binaire selon l'extension) dans un nouveau
+    RoomModel. Les formes sont ajoutées en bloc, sans test de collision ;
+    avec `check`, le plan est ensuite vérifié en une passe (InvalidLayout).
+    """
+    if filename.lower().endswith(".json"):
+        return load_json(filename, check, **room_options)
+    return load_binary(filename, check, **room_options)
@@ -0,0 +1,175 @@
+import math
+
+import numpy as np
+
+from shape import RectangleShape, CircleShape, BBOX_EPSILON
+from placement import make_probe, scan_limits, _collides
+
+
+class OccupancyGrid:
+    """
+    Trame d'occupation de la pièce : chaque cellule de `resolution` × `resolution`
+    unités compte les formes qui recouvrent une partie de son intérieur.
+    Deux formes qui se chevauchent partagent donc au moins une cellule ;
+    un simple contact sur un bord de cellule n'y apparaît pas et reste à la
+    charge du test exact.
+
+    S'abonne à un ShapeGroup (add_listener) pour rester à jour lors des
+    ajouts, suppressions et déplacements.
+    """
+
+    def __init__(self, room_width, room_height, resolution=1):
+        self.room_width = room_width
+        self.room_height = room_height
+        self.resolution = resolution
+        self.cols = math.ceil(room_width / resolution)
+        self.rows = math.ceil(room_height / resolution)
+        self.counts = np.zeros((self.rows, self.cols), dtype=np.uint16)
+        self.footprints = {}  # forme -> (ligne, colonne, masque)
+
+    # --- Observateur du ShapeGroup ---
+
+    def shape_added(self, shape):
+        self.burn(shape)
+
+    def shape_removed(self, shape):
+        self.erase(shape)
+
+    def shape_moved(self, shape):
+        self.erase(shape)
+        self.burn(shape)
+
+    # --- Rastérisation ---
+
+    def _cell_range(self, shape):
+        res = self.resolution
+        min_x, min_y, max_x, max_y = shape.get_bbox()
+        c0 = max(0, math.floor((min_x + BBOX_EPSILON) / res))
+        r0 = max(0, math.floor((min_y + BBOX_EPSILON) / res))
+        c1 = min(self.cols - 1, math.ceil((max_x - BBOX_EPSILON) / res) - 1)
+        r1 = min(self.rows - 1, math.ceil((max_y - BBOX_EPSILON) / res) - 1)
+        return r0, c0, r1, c1
+
+    def footprint(self, shape):
+        """
+        Masque booléen des cellules dont la forme recouvre l'intérieur, et position
+        (ligne, colonne) de son coin haut-gauche dans la trame.
+        """
+        r0, c0, r1, c1 = self._cell_range(shape)
+        if r1 < r0 or c1 < c0:
+            return r0, c0, np.zeros((0, 0), dtype=bool)
+
+        res = self.resolution
+        half = res / 2
+        xs = (np.arange(c0, c1 + 1) * res + half)[np.newaxis, :]
+        ys = (np.arange(r0, r1 + 1) * res + half)[:, np.newaxis]
+
+        if isinstance(shape, CircleShape):
+            cx, cy = shape.get_center()
+            dx = np.maximum(np.abs(xs - cx) - half, 0)
+            dy = np.maximum(np.abs(ys - cy) - half, 0)
+            r = shape.radius - BBOX_EPSILON
+            return r0, c0, dx * dx + dy * dy < r * r
+
+        # Polygone : test des axes séparateurs entre chaque cellule et la forme
+        # (les axes x et y sont déjà garantis par la boîte englobante).
+        verts = shape.get_corners() if isinstance(shape, RectangleShape) else shape.get_vertices()
+        mask = np.ones((r1 - r0 + 1, c1 - c0 + 1), dtype=bool)
+        for ax, ay in shape.get_axes():
+            proj = [px * ax + py * ay for (px, py) in verts]
+            center = xs * ax + ys * ay
+            extent = half * (abs(ax) + abs(ay)) - BBOX_EPSILON
+            mask &= (center - extent < max(proj)) & (center + extent > min(proj))
+        return r0, c0, mask
+
+    def burn(self, shape):
+        r0, c0, mask = self.footprint(shape)
+        h, w = mask.shape
+        self.counts[r0:r0 + h, c0:c0 + w] += mask
+        self.footprints[shape] = (r0, c0, mask)
+
+    def erase(self, shape):
+        entry = self.footprints.pop(shape, None)
+        if entry is None:
+            return
+        r0, c0, mask = entry
+        h, w = mask.shape
+        self.counts[r0:r0 + h, c0:c0 + w] -= mask
+
+    # --- Requêtes ---
+
+    def summed_area_table(self):
+        """
+        Table des sommes cumulées des cellules occupées, avec une ligne et une
+        colonne de zéros en tête et une cellule libre de marge à droite et en bas
+        (pour les pièces dont la taille n'est pas un multiple de la résolution).
+        """
+        occupied = np.zeros((self.rows + 1, self.cols + 1), dtype=np.int32)
+        occupied[:self.rows, :self.cols] = self.counts > 0
+        table = np.zeros((self.rows + 2, self.cols + 2), dtype=np.int32)
+        table[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+        return table
+
+    def free_positions(self, shape):
+        """
+        Positions (x, y), multiples de la résolution et dans l'ordre de balayage
+        haut-gauche, où la boîte englobante de la forme ne recouvre aucune
+        cellule occupée. Toutes les positions sont évaluées d'un coup par la
+        table des sommes cumulées ; le résultat est un tableau (n, 2).
+        """
+        limits = scan_limits(shape, self.room_width, self.room_height)
+        if limits is None:
+            return np.zeros((0, 2), dtype=np.int64)
+        max_x, max_y = limits
+
+        res = self.resolution
+        probe = make_probe(shape)
+        off_min_x, off_min_y, off_max_x, off_max_y = probe.get_bbox()
+        ox = math.floor((off_min_x + BBOX_EPSILON) / res)
+        oy = math.floor((off_min_y + BBOX_EPSILON) / res)
+        kw = max(1, math.ceil((off_max_x - BBOX_EPSILON) / res) - ox)
+        kh = max(1, math.ceil((off_max_y - BBOX_EPSILON) / res) - oy)
+
+        # Indices (i, j) de position : la fenêtre de cellules commence en
+        # (i + oy, j + ox) et doit rester dans la trame (marge comprise).
+        i0, j0 = max(0, -oy), max(0, -ox)
+        i1 = min(math.floor(max_y / res), self.rows + 1 - kh - oy)
+        j1 = min(math.floor(max_x / res), self.cols + 1 - kw - ox)
+        if i1 < i0 or j1 < j0:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        table = self.summed_area_table()
+        top, left = i0 + oy, j0 + ox
+        bottom, right = i1 + oy + kh, j1 + ox + kw
+        windows = (
+            table[top + kh:bottom + 1, left + kw:right + 1]
+            - table[top:bottom + 1 - kh, left + kw:right + 1]
+            - table[top + kh:bottom + 1, left:right + 1 - kw]
+            + table[top:bottom + 1 - kh, left:right + 1 - kw]
+        )
+        free = np.argwhere(windows == 0)
+        positions = np.empty_like(free)
+        positions[:, 0] = (free[:, 1] + j0) * res
+        positions[:, 1] = (free[:, 0] + i0) * res
+        return positions
+
+    def find_spawn_position(self, shape, shapes):
+        """
+        Première position libre selon la trame, confirmée par un test exact
+        (bornes de la pièce et collisions avec les voisins de `shapes`).
+        La trame teste la boîte englobante de la forme : une position très
+        serrée entre des formes tournées ou des cercles peut lui échapper, et
+        seules les positions multiples de la résolution sont proposées.
+        find_spawn_position du module placement reste la recherche exacte
+        de référence (RoomModel s'y replie quand la trame ne trouve rien).
+        """
+        probe = make_probe(shape)
+        for x, y in self.free_positions(shape).tolist():
+            probe.x, probe.y = x, y
+            min_x, min_y, max_x, max_y = probe.get_bbox()
+            if min_x < 0 or min_y < 0 or max_x > self.room_width or max_y > self.room_height:
+                continue
+            if any(_collides(probe, other) for other in probe._neighbours(shapes)):
+                continue
+            return (x, y)
+        return None
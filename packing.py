@@ -0,0 +1,193 @@
+import math
+
+from shape import RectangleShape, CircleShape, TriangleShape
+from visitor import AreaCalculatorVisitor
+from placement import make_probe, _collides
+from spatial import SpatialGrid
+
+
+def shape_from_spec(spec):
+    """
+    Crée une forme à partir d'une description, par exemple
+    {"type": "rectangle", "name": "Bureau", "width": 120, "height": 60, "color": "#a0c4ff"}.
+    Clés selon le type : width/height (rectangle), radius (circle),
+    base/height (triangle) ; x, y, color et angle sont facultatifs.
+    """
+    kind = spec["type"]
+    name = spec.get("name", kind)
+    color = spec.get("color", "#a0c4ff")
+    x, y = spec.get("x", 0), spec.get("y", 0)
+    if kind == "rectangle":
+        return RectangleShape(name, x, y, spec["width"], spec["height"], color, angle=spec.get("angle", 0))
+    if kind == "circle":
+        return CircleShape(name, x, y, spec["radius"], color)
+    if kind == "triangle":
+        return TriangleShape(name, x, y, spec["base"], spec["height"], color, angle=spec.get("angle", 0))
+    raise ValueError(f"Type de forme inconnu : {kind}")
+
+
+def allowed_angles(shape):
+    """
+    Orientations essayées : 0/90° pour un rectangle (une seule s'il est carré),
+    quatre quarts de tour pour un triangle, aucune pour un cercle.
+    """
+    if isinstance(shape, RectangleShape):
+        turns = (0,) if shape.width == shape.height else (0, 90)
+    elif isinstance(shape, TriangleShape):
+        turns = (0, 90, 180, 270)
+    else:
+        return (None,)
+    return tuple((shape.angle + turn) % 360 for turn in turns)
+
+
+def _packing_order(shapes):
+    # Les plus grandes d'abord (aire, puis plus grande dimension)
+    def key(shape):
+        visitor = AreaCalculatorVisitor()
+        shape.accept(visitor)
+        min_x, min_y, max_x, max_y = shape.get_bbox()
+        return visitor.get_total_area(), max(max_x - min_x, max_y - min_y)
+
+    return sorted(shapes, key=key, reverse=True)
+
+
+def _candidate_points(shape):
+    """
+    Points d'appui créés par une forme placée : à droite de sa boîte (même
+    haut) et sous sa boîte (même gauche). Le booléen indique que la nouvelle
+    boîte doit dépasser strictement la coordonnée, un contact comptant
+    comme une collision.
+    """
+    min_x, min_y, max_x, max_y = shape.get_bbox()
+    return [(min_y, max_x, False, True), (max_y, min_x, True, False)]
+
+
+def _covered(point, shapes):
+    """
+    Vrai si le coin du point d'appui est à l'intérieur d'une forme placée :
+    aucun rectangle ne peut plus s'y appuyer, et le point est abandonné.
+    """
+    py, px, _, _ = point
+    x, y = px + 0.5, py + 0.5
+    return any(other.contains(x, y) for other in shapes.query((x, y, x, y)))
+
+
+def _offset(value, offset, strict):
+    # Position entière dont la boîte commence à `value` (strictement après si `strict`)
+    if strict:
+        return math.floor(value - offset) + 1
+    return math.ceil(value - offset)
+
+
+def _signature(shape, angle):
+    if isinstance(shape, RectangleShape):
+        return "rectangle", shape.width, shape.height, angle
+    if isinstance(shape, CircleShape):
+        return "circle", shape.radius
+    return "triangle", shape.base, shape.height, angle
+
+
+def _best_fit(probe, angles, points, room_width, room_height, shapes, dead):
+    """
+    Meilleure pose (bas de boîte, gauche de boîte, x, y, angle) de la sonde
+    sur les points d'appui, ou None : pour chaque orientation, le premier
+    point libre dans l'ordre haut-gauche ; entre orientations, celle dont
+    la boîte descend le moins, puis la plus à gauche.
+
+    Pendant un remplissage, les formes ne font que s'ajouter : une pose en
+    collision le reste. `dead` garde ces poses par forme et orientation,
+    pour que les articles identiques suivants ne les testent plus.
+    """
+    best = None
+    for angle in angles:
+        if angle is not None:
+            probe.angle = angle
+        probe.x, probe.y = 0, 0
+        off_min_x, off_min_y, off_max_x, off_max_y = probe.get_bbox()
+        blocked = dead.setdefault(_signature(probe, angle), set())
+        for (py, px, strict_y, strict_x) in points:
+            x = _offset(px, off_min_x, strict_x)
+            y = _offset(py, off_min_y, strict_y)
+            if best is not None and y + off_max_y > best[0]:
+                break  # points triés : les suivants descendent plus bas
+            if x < 0 or y < 0 or (x, y) in blocked:
+                continue
+            probe.x, probe.y = x, y
+            min_x, min_y, max_x, max_y = probe.get_bbox()
+            if min_x < 0 or min_y < 0 or max_x > room_width or max_y > room_height:
+                blocked.add((x, y))
+                continue
+            if any(_collides(probe, other) for other in probe._neighbours(shapes)):
+                blocked.add((x, y))
+                continue
+            if best is None or (max_y, min_x) < best[:2]:
+                best = (max_y, min_x, x, y, angle)
+            break
+    return best
+
+
+def pack_shapes(shapes, room_width, room_height, group, area_limit=None, progress=None):
+    """
+    Place un lot de formes dans la pièce (heuristique « bas-gauche » sur
+    points d'appui) et les ajoute à `group`, le ShapeGroup des formes déjà
+    placées. Les formes sont traitées de la plus grande à la plus petite ;
+    chacune prend la meilleure orientation permise et la première position
+    libre parmi les points d'appui (origine de la pièce, et droite / dessous
+    de chaque forme placée, tant qu'ils ne sont pas recouverts). Les
+    collisions sont testées exactement ; comme toute heuristique de
+    remplissage, le résultat n'est pas forcément le rangement optimal.
+
+    Renvoie (placées, non placées) ; une forme non placée garde sa position
+    et son angle d'origine. `area_limit` borne la surface totale occupée ;
+    `progress` reçoit la fraction de formes traitées.
+    """
+    points = SpatialGrid()
+    seen = set()
+
+    def add_points(shape):
+        for point in _candidate_points(shape):
+            if point not in seen and not _covered(point, group):
+                seen.add(point)
+                points.insert(point, (point[1], point[0], point[1], point[0]))
+
+    def drop_covered(shape):
+        for point in points.query(shape.get_bbox()):
+            if _covered(point, group):
+                points.remove(point)
+
+    seen.add((0, 0, False, False))
+    if not _covered((0, 0, False, False), group):
+        points.insert((0, 0, False, False), (0, 0, 0, 0))
+    for other in group.children:
+        add_points(other)
+    ordered = sorted(points.entries)
+
+    dead = {}
+    placed, unplaced = [], []
+    for i, shape in enumerate(_packing_order(shapes)):
+        if progress is not None:
+            progress(i / len(shapes))
+        visitor = AreaCalculatorVisitor()
+        shape.accept(visitor)
+        if area_limit is not None and group.get_total_area() + visitor.get_total_area() > area_limit:
+            unplaced.append(shape)
+            continue
+
+        probe = make_probe(shape)
+        best = _best_fit(probe, allowed_angles(shape), ordered, room_width, room_height, group, dead)
+        if best is None:
+            unplaced.append(shape)
+            continue
+
+        _, _, x, y, angle = best
+        if angle is not None:
+            shape.angle = angle
+        shape.x, shape.y = x, y
+        group.add(shape)
+        placed.append(shape)
+
+        drop_covered(shape)
+        add_points(shape)
+        ordered = sorted(points.entries)
+
+    return placed, unplaced
@@ -0,0 +1,597 @@
+import atexit
+import heapq
+import math
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, repeat
+
+from shape import (
+    RectangleShape, CircleShape, TriangleShape, ShapeGroup, BBOX_EPSILON,
+    shape_to_record, shape_from_record,
+)
+from store import RECTANGLE, CIRCLE, TRIANGLE, COLUMNS
+
+
+def make_probe(shape):
+    """
+    Copie de travail de la forme, déplacée sur chaque position candidate.
+    """
+    if isinstance(shape, RectangleShape):
+        return RectangleShape(
+            shape.name + "_tmp", 0, 0, shape.width, shape.height, shape.color, angle=shape.angle
+        )
+    if isinstance(shape, CircleShape):
+        return CircleShape(shape.name + "_tmp", 0, 0, shape.radius, shape.color)
+    return TriangleShape(
+        shape.name + "_tmp", 0, 0, shape.base, shape.height, shape.color, angle=shape.angle
+    )
+
+
+def scan_limits(shape, room_width, room_height):
+    """
+    Dernières positions (x, y) explorées par le balayage, ou None si la forme
+    ne peut pas entrer dans la pièce.
+    """
+    if isinstance(shape, RectangleShape):
+        max_x, max_y = room_width - shape.width, room_height - shape.height
+    elif isinstance(shape, CircleShape):
+        max_x, max_y = room_width - 2 * shape.radius, room_height - 2 * shape.radius
+    else:  # TriangleShape
+        max_x, max_y = room_width, room_height
+    if max_x < 0 or max_y < 0:
+        return None
+    return math.floor(max_x), math.floor(max_y)
+
+
+CIRCLE_SIDES = 64  # côtés du polygone inscrit qui remplace un cercle
+_UNIT_CIRCLE = tuple(
+    (math.cos(2 * math.pi * k / CIRCLE_SIDES), math.sin(2 * math.pi * k / CIRCLE_SIDES))
+    for k in range(CIRCLE_SIDES)
+)
+
+
+def is_axis_aligned(shape):
+    # Pour deux rectangles non tournés, la collision équivaut exactement au
+    # chevauchement des boîtes englobantes.
+    return isinstance(shape, RectangleShape) and shape.angle % 360 == 0
+
+
+def _collides(probe, other):
+    # La sonde change de version à chaque position essayée : ses résultats ne
+    # seraient jamais relus, et le cache partagé n'est pas utilisé ici.
+    return probe.intersects_with(other) or other.intersects_with(probe)
+
+
+def _outline(shape):
+    """
+    Contour convexe de la forme ; un cercle est remplacé par un polygone
+    inscrit, donc contenu dans le disque.
+    """
+    if isinstance(shape, CircleShape):
+        cx, cy = shape.get_center()
+        r = shape.radius
+        return [(cx + r * c, cy + r * s) for c, s in _UNIT_CIRCLE]
+    if isinstance(shape, RectangleShape):
+        return list(shape.get_corners())
+    return list(shape.get_vertices())
+
+
+def _normalized(points):
+    # Sens direct (aire signée positive), en commençant par le sommet le plus bas
+    area = sum(ax * by - bx * ay for (ax, ay), (bx, by) in zip(points, points[1:] + points[:1]))
+    if area == 0:
+        return None
+    if area < 0:
+        points = points[::-1]
+    k = min(range(len(points)), key=lambda i: (points[i][1], points[i][0]))
+    return points[k:] + points[:k]
+
+
+def _minkowski_sum(first, second):
+    """
+    Somme de Minkowski de deux polygones convexes (fusion des arêtes par
+    angle), ou None si l'un d'eux est dégénéré.
+    """
+    p, q = _normalized(first), _normalized(second)
+    if p is None or q is None:
+        return None
+    n, m = len(p), len(q)
+    result = []
+    i = j = 0
+    while i < n or j < m:
+        (ax, ay), (bx, by) = p[i % n], q[j % m]
+        result.append((ax + bx, ay + by))
+        (cx, cy), (dx, dy) = p[(i + 1) % n], q[(j + 1) % m]
+        cross = (cx - ax) * (dy - by) - (cy - ay) * (dx - bx)
+        if cross >= 0 and i < n:
+            i += 1
+        if cross <= 0 and j < m:
+            j += 1
+    return result
+
+
+def _chain_x(edges, y, k):
+    # Abscisse en y de la chaîne d'arêtes triées, à partir de l'arête k
+    while k < len(edges) - 1 and edges[k][3] < y:
+        k += 1
+    x1, y1, x2, y2 = edges[k]
+    return x1 + (x2 - x1) * (y - y1) / (y2 - y1), k
+
+
+def _blocked_rows(polygon, rows=None):
+    """
+    Positions entières à l'intérieur d'un polygone convexe, par bandes de
+    lignes : liste de [première ligne, dernière ligne, x_début, x_fin],
+    limitée aux lignes [première, dernière] de `rows` si donné.
+    Les positions à moins de BBOX_EPSILON du bord sont exclues : un simple
+    contact dépend des arrondis du test exact, qui seul en décide.
+    """
+    polygon = _normalized(polygon)
+    if polygon is None:
+        return []
+    # Sens direct : l'intérieur est à gauche des arêtes ; celles qui montent
+    # bordent la droite du polygone, celles qui descendent la gauche.
+    left, right = [], []
+    for (ax, ay), (bx, by) in zip(polygon, polygon[1:] + polygon[:1]):
+        if by > ay:
+            right.append((ax, ay, bx, by))
+        elif by < ay:
+            left.append((bx, by, ax, ay))
+    if not left or not right:
+        return []
+    left.sort(key=lambda e: e[1])
+    right.sort(key=lambda e: e[1])
+    y_min, y_max = left[0][1], left[-1][3]
+
+    first, last = math.ceil(y_min + BBOX_EPSILON), math.floor(y_max - BBOX_EPSILON)
+    if rows is not None:
+        first, last = max(first, rows[0]), min(last, rows[1])
+
+    bands = []
+    kl = kr = 0
+    for row in range(first, last + 1):
+        y = min(max(row, y_min), y_max)
+        x_left, kl = _chain_x(left, y, kl)
+        x_right, kr = _chain_x(right, y, kr)
+        a, b = math.ceil(x_left + BBOX_EPSILON), math.floor(x_right - BBOX_EPSILON)
+        if a > b:
+            continue
+        if bands and bands[-1][1] == row - 1 and bands[-1][2] == a and bands[-1][3] == b:
+            bands[-1][1] = row
+        else:
+            bands.append([row, row, a, b])
+    return bands
+
+
+def _obstacle_rows(probe, outline, other):
+    """
+    Bandes de positions où la sonde (de contour `outline` en (0, 0)) heurte
+    `other` : la somme de Minkowski de l'obstacle et de la sonde retournée.
+    Pour un cercle, le polygone inscrit donne un sous-ensemble de ces
+    positions ; les autres sont laissées au test exact. Pour deux rectangles
+    non tournés, c'est exactement la boîte de l'obstacle élargie de celle
+    de la sonde, bords compris.
+    """
+    if is_axis_aligned(probe) and is_axis_aligned(other):
+        off_min_x, off_min_y, off_max_x, off_max_y = probe.get_bbox()
+        o_min_x, o_min_y, o_max_x, o_max_y = other.get_bbox()
+        return [[math.ceil(o_min_y - off_max_y), math.floor(o_max_y - off_min_y),
+                 math.ceil(o_min_x - off_max_x), math.floor(o_max_x - off_min_x)]]
+    polygon = _minkowski_sum(_outline(other), [(-x, -y) for x, y in outline])
+    return _blocked_rows(polygon) if polygon is not None else []
+
+
+def find_spawn_position(shape, room_width, room_height, shapes, y_range=None, workers=None,
+                        progress=None):
+    """
+    Première position libre (x, y) à coordonnées entières, dans l'ordre de
+    balayage haut-gauche (ligne par ligne, de gauche à droite), ou None.
+
+    Le résultat est le même que celui d'un balayage pixel par pixel, mais
+    le premier test exact qui touche un obstacle calcule d'un coup, ligne
+    par ligne, l'intervalle des positions bloquées par celui-ci (somme de
+    Minkowski des deux contours convexes) : les lignes suivantes sautent
+    ces intervalles sans aucun test, et une ligne entièrement couverte est
+    sautée jusqu'au premier changement d'intervalle. `shapes` est le
+    ShapeGroup des formes déjà placées ; `y_range` limite éventuellement le
+    balayage aux lignes [début, fin[.
+
+    Avec `workers` > 1, les lignes sont réparties en bandes balayées par
+    autant de processus (voir parallel_spawn_position) ; le résultat est
+    identique. `progress`, s'il est donné, est appelé régulièrement avec la
+    fraction parcourue ; il peut lever une exception pour interrompre la
+    recherche (annulation).
+    """
+    limits = scan_limits(shape, room_width, room_height)
+    if limits is None:
+        return None
+    max_x, max_y = limits
+
+    if workers is not None and workers > 1:
+        y_first, y_end = y_range if y_range is not None else (0, max_y + 1)
+        return parallel_spawn_position(
+            shape, room_width, room_height, shapes, workers, (y_first, min(y_end, max_y + 1)),
+            progress=progress,
+        )
+
+    probe = make_probe(shape)
+    origin = make_probe(shape)  # sonde fixe en (0, 0) pour les sommes de Minkowski
+    off_min_x, off_min_y, off_max_x, off_max_y = probe.get_bbox()
+    outline = _outline(origin)
+
+    # Positions pour lesquelles la boîte de la sonde reste dans la pièce ;
+    # les bornes exactes sont revérifiées à chaque position.
+    x_start = max(0, math.ceil(-off_min_x - BBOX_EPSILON))
+    x_stop = min(max_x, math.floor(room_width - off_max_x + BBOX_EPSILON))
+    y_start = max(0, math.ceil(-off_min_y - BBOX_EPSILON))
+    y_stop = min(max_y, math.floor(room_height - off_max_y + BBOX_EPSILON))
+    if y_range is not None:
+        y_start = max(y_start, y_range[0])
+        y_stop = min(y_stop, y_range[1] - 1)
+
+    blocked = {}  # obstacle touché -> [bandes, indice de la bande courante]
+
+    def row_span(entry, y):
+        # Intervalle bloqué sur la ligne y (ou None), bandes passées oubliées
+        bands, k = entry
+        while k < len(bands) and bands[k][1] < y:
+            k += 1
+        entry[1] = k
+        if k < len(bands) and bands[k][0] <= y:
+            return bands[k]
+        return None
+
+    y = y_start
+    while y <= y_stop:
+        if progress is not None:
+            progress((y - y_start) / (y_stop - y_start + 1))
+        spans = []
+        for other in list(blocked):
+            entry = blocked[other]
+            band = row_span(entry, y)
+            if band is not None:
+                spans.append(band)
+            elif entry[1] == len(entry[0]):
+                del blocked[other]
+        spans.sort(key=lambda band: band[2])
+
+        tested = False
+        i = 0
+        x = x_start
+        while True:
+            while i < len(spans) and spans[i][2] <= x:
+                x = max(x, spans[i][3] + 1)
+                i += 1
+            if x > x_stop:
+                break
+
+            probe.x, probe.y = x, y
+            p_min_x, p_min_y, p_max_x, p_max_y = probe.get_bbox()
+            if p_min_y < 0 or p_max_y > room_height:
+                tested = True
+                break
+            if p_min_x < 0 or p_max_x > room_width:
+                x += 1
+                continue
+
+            tested = True
+            hit = False
+            x_last = x
+            for other in probe._neighbours(shapes):
+                if not _collides(probe, other):
+                    continue
+                hit = True
+                entry = blocked.get(other)
+                if entry is None:
+                    entry = blocked[other] = [_obstacle_rows(origin, outline, other), 0]
+                band = row_span(entry, y)
+                if band is not None and band[2] <= x <= band[3]:
+                    x_last = max(x_last, band[3])
+
+            if not hit:
+                return (x, y)
+            x = x_last + 1
+
+        if not tested and spans:
+            # Ligne entièrement couverte : rien ne change avant la fin de
+            # la première bande utilisée.
+            y = max(y + 1, min(band[1] for band in spans) + 1)
+        else:
+            y += 1
+
+    return None
+
+
+def _spiral_offsets(radius, spans, x_limits, y_limits):
+    """
+    Décalages entiers (dx, dy) du disque de rayon `radius`, du plus proche au
+    plus lointain (puis par angle) : un parcours en spirale autour de (0, 0).
+    Les décalages hors des bornes `x_limits` / `y_limits` et ceux des
+    intervalles bloqués `spans` (ligne dy -> [[x_début, x_fin], ...], triés
+    et disjoints) sont sautés sans être énumérés ; `spans` peut grandir
+    pendant le parcours.
+
+    Chaque demi-ligne (dx >= 0, dx < 0) produit ses décalages par |dx|
+    croissant ; un tas les fusionne dans l'ordre de la spirale.
+    """
+    def blocked(dx, dy):
+        # Intervalle bloqué contenant dx sur la ligne dy, ou None
+        row = spans.get(dy)
+        if row:
+            i = bisect_right(row, [dx, math.inf]) - 1
+            if i >= 0 and row[i][1] >= dx:
+                return row[i]
+        return None
+
+    def half_row(dy, width, step):
+        lo, hi = max(x_limits[0], -width), min(x_limits[1], width)
+        dx = max(0, lo) if step > 0 else min(-1, hi)
+        while lo <= dx <= hi:
+            span = blocked(dx, dy)
+            if span is not None:
+                dx = span[1] + 1 if step > 0 else span[0] - 1
+                continue
+            yield dx * dx + dy * dy, math.atan2(dy, dx), dx, dy
+            dx += step
+
+    heap = []
+    for dy in range(max(-radius, y_limits[0]), min(radius, y_limits[1]) + 1):
+        width = math.isqrt(radius * radius - dy * dy)
+        for step in (1, -1):
+            row = half_row(dy, width, step)
+            for first in row:
+                heap.append((first, row))
+                break
+    heapq.heapify(heap)
+    while heap:
+        (_, _, dx, dy), row = heap[0]
+        if blocked(dx, dy) is None:  # intervalle ajouté depuis
+            yield dx, dy
+        for following in row:
+            heapq.heapreplace(heap, (following, row))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+def _block(spans, bands):
+    # Ajoute des bandes de _blocked_rows aux intervalles bloqués par ligne,
+    # en fusionnant les intervalles qui se chevauchent ou se suivent
+    for first, last, a, b in bands:
+        for dy in range(first, last + 1):
+            row = spans.setdefault(dy, [])
+            i = bisect_right(row, [a, math.inf])
+            if i > 0 and row[i - 1][1] >= a - 1:
+                i -= 1
+                a = row[i][0]
+            j = i
+            while j < len(row) and row[j][0] <= b + 1:
+                b = max(b, row[j][1])
+                j += 1
+            row[i:j] = [[a, b]]
+
+
+def nearest_free_position(shape, room_width, room_height, shapes, max_distance, angle=None):
+    """
+    Position libre la plus proche de celle de `shape` (à `angle` près, si
+    donné), à moins de `max_distance` : les décalages entiers sont parcourus
+    en spirale et chaque position est soumise aux mêmes tests que move_to
+    (bornes, puis collision vue depuis la forme, voisins pris dans l'index
+    spatial). Comme pour find_spawn_position, le premier test qui touche un
+    obstacle calcule d'un coup les décalages qu'il bloque (somme de
+    Minkowski, voir _obstacle_rows) : ils ne sont plus jamais énumérés, et
+    la recherche s'arrête dès que tout le disque est couvert.
+    Renvoie (x, y) ou None. La forme n'est pas modifiée.
+    """
+    probe = make_probe(shape)
+    if angle is not None and not isinstance(probe, CircleShape):
+        probe.angle = angle
+    x0, y0 = shape.x, shape.y
+    probe.x, probe.y = x0, y0
+    min_x, min_y, max_x, max_y = probe.get_bbox()
+    reflected = [(-x, -y) for x, y in _outline(probe)]  # sonde en (x0, y0)
+    radius = max_distance
+
+    eps = BBOX_EPSILON
+    x_limits = (math.ceil(-min_x - eps), math.floor(room_width - max_x + eps))
+    y_limits = (math.ceil(-min_y - eps), math.floor(room_height - max_y + eps))
+    spans = {}
+    seen = {shape}
+    for dx, dy in _spiral_offsets(radius, spans, x_limits, y_limits):
+        probe.x, probe.y = x0 + dx, y0 + dy
+        p_min_x, p_min_y, p_max_x, p_max_y = probe.get_bbox()
+        if p_min_x < 0 or p_min_y < 0 or p_max_x > room_width or p_max_y > room_height:
+            continue
+        hit = False
+        for other in probe._neighbours(shapes):
+            if other is shape or not probe.intersects_with(other):
+                continue
+            hit = True
+            if other not in seen:
+                # Un seul nouvel obstacle par position bloquée : les autres
+                # ne seront souvent jamais atteints par la spirale
+                seen.add(other)
+                polygon = _minkowski_sum(_outline(other), reflected)
+                if polygon is not None:
+                    _block(spans, _blocked_rows(polygon, (-radius, radius)))
+                break
+        if not hit:
+            return (x0 + dx, y0 + dy)
+    return None
+
+
+# --- Recherche parallèle ---
+
+# Pool de processus gardé d'une recherche à l'autre, et plans déjà envoyés :
+# les formes ne sont écrites qu'une fois par version du plan, dans un
+# fichier que chaque processus relit une seule fois.
+_pool = None
+_pool_workers = 0
+_pool_search = None  # numéro de la recherche en cours, partagé avec les processus
+_pool_lock = threading.Lock()  # une recherche parallèle à la fois
+_shipped = OrderedDict()  # clé du plan -> fichier de ses colonnes
+_SHIPPED_LAYOUTS = 4      # plans gardés (recherches concurrentes sur des copies)
+_list_keys = count()
+
+_worker_shapes = None  # ShapeGroup reconstruit une fois par version et par processus
+_worker_layout = None
+_worker_search = None
+
+
+class _Superseded(Exception):
+    pass
+
+
+def _layout_columns(shapes):
+    # Colonnes (type, x, y, a, b, angle) des formes placées
+    if isinstance(shapes, ShapeGroup):
+        store = shapes.store
+        return [store.kind] + [getattr(store, name) for name in COLUMNS]
+    kinds = {"rectangle": RECTANGLE, "circle": CIRCLE, "triangle": TRIANGLE}
+    records = [shape_to_record(shape) for shape in shapes]
+    return [array("b", [kinds[record[0]] for record in records])] + [
+        array("d", [record[i] for record in records]) for i in range(1, 6)
+    ]
+
+
+def _ship_layout(shapes):
+    """
+    (clé, fichier) du plan pour les processus. Un ShapeGroup change de
+    version à chaque modification : tant qu'elle ne change pas, le fichier
+    déjà écrit (et déjà chargé par les processus) est réutilisé.
+    """
+    if isinstance(shapes, ShapeGroup):
+        key = ("group", shapes.version)
+    else:
+        key = ("list", next(_list_keys))
+    path = _shipped.get(key)
+    if path is not None:
+        _shipped.move_to_end(key)
+        return key, path
+
+    fd, path = tempfile.mkstemp(prefix="spawn-", suffix=".layout")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(_layout_columns(shapes), f, pickle.HIGHEST_PROTOCOL)
+    _shipped[key] = path
+    while len(_shipped) > _SHIPPED_LAYOUTS:
+        _, old = _shipped.popitem(last=False)
+        os.remove(old)
+    return key, path
+
+
+def _init_worker(search):
+    global _worker_search
+    _worker_search = search
+
+
+def _spawn_pool(workers):
+    global _pool, _pool_workers, _pool_search
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        # Jamais de fork : le pool est créé depuis un thread de JobRunner,
+        # pendant que Tk et les autres threads tournent
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        _pool_search = context.RawValue("q", 0)
+        _pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                    initargs=(_pool_search,))
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_spawn_pool():
+    """
+    Arrête le pool de la recherche parallèle et supprime les plans envoyés
+    (appelé à la fermeture de l'application, et en fin de programme).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        while _shipped:
+            _, path = _shipped.popitem()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+atexit.register(shutdown_spawn_pool)
+
+
+def _load_layout(key, path):
+    global _worker_shapes, _worker_layout
+    if _worker_layout != key:
+        with open(path, "rb") as f:
+            kind, *columns = pickle.load(f)
+        group = ShapeGroup()
+        group.add_columns(kind, *columns, repeat(""), repeat("white"))
+        _worker_shapes, _worker_layout = group, key
+    return _worker_shapes
+
+
+def _search_band(record, room_width, room_height, y_range, layout, search):
+    def check(_):
+        # Bande devenue inutile (position trouvée plus haut, ou annulation) :
+        # le processus se libère pour la recherche suivante
+        if _worker_search.value != search:
+            raise _Superseded
+
+    shape = shape_from_record(record)
+    try:
+        return find_spawn_position(shape, room_width, room_height, _load_layout(*layout), y_range,
+                                   progress=check)
+    except _Superseded:
+        return None
+
+
+def parallel_spawn_position(shape, room_width, room_height, shapes, workers, y_range,
+                            bands_per_worker=4, progress=None):
+    """
+    find_spawn_position réparti sur un ProcessPoolExecutor : les lignes
+    [début, fin[ sont découpées en bandes consécutives, chacune balayée
+    exactement par un processus. Le pool est gardé d'un appel à l'autre et
+    les formes placées ne sont envoyées qu'une fois par version du plan
+    (colonnes compactes, voir _ship_layout). Les résultats sont lus dans
+    l'ordre des bandes : le premier trouvé est la même position haut-gauche
+    qu'un balayage séquentiel, et les bandes suivantes encore en attente
+    sont annulées.
+    """
+    y_first, y_end = y_range
+    if y_end <= y_first:
+        return None
+    band = max(1, math.ceil((y_end - y_first) / (workers * bands_per_worker)))
+    record = shape_to_record(shape)
+
+    with _pool_lock:
+        layout = _ship_layout(shapes)
+        pool = _spawn_pool(workers)
+        search = _pool_search.value
+        futures = [
+            pool.submit(_search_band, record, room_width, room_height,
+                        (start, min(start + band, y_end)), layout, search)
+            for start in range(y_first, y_end, band)
+        ]
+        try:
+            for i, future in enumerate(futures):
+                if progress is not None:
+                    progress(i / len(futures))
+                position = future.result()
+                if position is not None:
+                    return position
+        finally:
+            # Les bandes en attente sont annulées, celles en cours s'arrêtent
+            # à leur prochaine ligne
+            _pool_search.value = search + 1
+            for pending in futures:
+                pending.cancel()
+    return None
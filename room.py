@@ -0,0 +1,258 @@
+import math
+from array import array
+
+from shape import RectangleShape, CircleShape, TriangleShape, ShapeGroup
+from store import COLUMNS
+from visitor import AreaCalculatorVisitor
+from placement import find_spawn_position, nearest_free_position
+from packing import pack_shapes
+from history import History, AddShape, RemoveShape, PoseChange, pose_of
+
+
+class LayoutError(Exception):
+    """
+    Opération refusée par les règles de la pièce.
+    """
+
+
+class AreaLimitExceeded(LayoutError):
+    pass
+
+
+class NoFreeSpace(LayoutError):
+    pass
+
+
+class ShapeTooLarge(LayoutError):
+    pass
+
+
+class RotationError(LayoutError):
+    pass
+
+
+class RoomModel:
+    """
+    Moteur de la pièce, sans interface graphique : il possède le ShapeGroup
+    et applique les règles (bornes, surface, placement, rotation).
+    Les résultats sont des valeurs de retour ou des exceptions LayoutError ;
+    l'affichage des messages reste à la charge de la vue (SpacePlannerApp).
+    """
+
+    def __init__(self, width, height, raster_resolution=None, workers=None):
+        self.width = width
+        self.height = height
+        self.area = width * height
+        self.shape_group = ShapeGroup()
+        # Annuler / rétablir : ajouts, suppressions, déplacements et rotations
+        self.history = History(self.shape_group)
+
+        # Nombre de processus pour la recherche d'emplacement exacte
+        # (None : recherche séquentielle)
+        self.workers = workers
+
+        # Trame d'occupation optionnelle (NumPy) pour la recherche d'emplacement
+        self.occupancy = None
+        if raster_resolution:
+            from occupancy import OccupancyGrid
+            self.occupancy = OccupancyGrid(width, height, raster_resolution)
+            self.shape_group.add_listener(self.occupancy)
+
+    @property
+    def shapes(self):
+        return self.shape_group.children
+
+    def used_area(self):
+        return self.shape_group.get_total_area()
+
+    def remaining_area(self):
+        return self.area - self.used_area()
+
+    def in_bounds(self, shape):
+        min_x, min_y, max_x, max_y = shape.get_bbox()
+        return min_x >= 0 and min_y >= 0 and max_x <= self.width and max_y <= self.height
+
+    def find_spawn_position(self, shape, progress=None):
+        if self.occupancy is not None:
+            position = self.occupancy.find_spawn_position(shape, self.shape_group)
+            if position is not None:
+                return position
+            # La trame ne propose que des positions alignées : un échec n'est
+            # pas une preuve, la recherche exacte tranche.
+        return find_spawn_position(
+            shape, self.width, self.height, self.shape_group, workers=self.workers,
+            progress=progress,
+        )
+
+    def snapshot(self):
+        """
+        Copie indépendante de la pièce et de ses formes (mêmes noms, couleurs
+        et géométries), à utiliser hors du thread de l'interface pendant que
+        l'original continue d'être modifié.
+        """
+        resolution = self.occupancy.resolution if self.occupancy is not None else None
+        copy = RoomModel(self.width, self.height, resolution, self.workers)
+        # Copie des colonnes du ShapeStore, dans l'ordre des formes (ordre
+        # d'empilement) : directe tant qu'aucune forme n'a été retirée
+        store = self.shape_group.store
+        columns = [store.kind] + [getattr(store, name) for name in COLUMNS]
+        rows = [shape._row for shape in self.shapes]
+        if rows == list(range(len(rows))):
+            columns = [column[:] for column in columns]
+        else:
+            columns = [array(column.typecode, map(column.__getitem__, rows)) for column in columns]
+        copy.shape_group.add_columns(
+            *columns, [shape.name for shape in self.shapes], [shape.color for shape in self.shapes]
+        )
+        # Même contenu, même version : le plan déjà envoyé aux processus de
+        # la recherche parallèle (placement._ship_layout) reste valable
+        copy.shape_group.version = self.shape_group.version
+        return copy
+
+    def check_area(self, shape):
+        visitor = AreaCalculatorVisitor()
+        shape.accept(visitor)
+        if self.used_area() + visitor.get_total_area() > self.area:
+            raise AreaLimitExceeded("Not enough space in the room. Please remove a shape.")
+
+    def place(self, shape, position=None):
+        """
+        Place une nouvelle forme au premier emplacement libre et l'ajoute.
+        Renvoie sa position (x, y).
+
+        `position` est un emplacement déjà calculé (par exemple en arrière-plan,
+        sur un instantané de la pièce) : il est revérifié sur la pièce actuelle
+        et NoFreeSpace est levée s'il a été occupé entre-temps.
+        """
+        self.check_area(shape)
+
+        spawn = position if position is not None else self.find_spawn_position(shape)
+        if spawn is None:
+            raise NoFreeSpace("Impossible de placer la forme : plus d'espace disponible.")
+
+        shape.x, shape.y = spawn
+        if not self.in_bounds(shape):
+            if isinstance(shape, RectangleShape):
+                raise ShapeTooLarge("Ce rectangle ne rentre pas dans la pièce.")
+            if isinstance(shape, CircleShape):
+                raise ShapeTooLarge("Ce cercle ne rentre pas dans la pièce.")
+            raise ShapeTooLarge("Ce triangle ne rentre pas dans la pièce.")
+
+        if position is not None and not shape.move_to(
+            spawn[0], spawn[1], self.width, self.height, self.shape_group
+        ):
+            raise NoFreeSpace("L'emplacement trouvé vient d'être occupé.")
+
+        self.shape_group.add(shape)
+        self.history.record(AddShape(shape))
+        return spawn
+
+    def pack(self, shapes, progress=None):
+        """
+        Place un lot de formes (les plus grandes d'abord, orientations permises
+        essayées) sans dépasser la surface de la pièce.
+        Renvoie (placées, non placées).
+        """
+        placed, unplaced = pack_shapes(
+            shapes, self.width, self.height, self.shape_group, area_limit=self.area, progress=progress
+        )
+        with self.history.batch():
+            for shape in placed:
+                self.history.record(AddShape(shape))
+        return placed, unplaced
+
+    def validate_layout(self):
+        """
+        Toutes les paires de formes qui se chevauchent et toutes les formes
+        hors de la pièce : (paires, hors pièce). Voir ShapeGroup.validate_layout.
+        """
+        return self.shape_group.validate_layout(self.width, self.height)
+
+    def remove(self, shape):
+        rank = self.shape_group.remove(shape)
+        self.history.record(RemoveShape(shape, rank))
+
+    def move(self, shape, x, y, mode="block"):
+        """
+        Déplace une forme. `mode` : "block" (refus si bloqué), "contact"
+        (arrêt au contact) ou "slide" (glissement le long de l'obstacle).
+        Renvoie True si la forme a bougé.
+
+        Les déplacements successifs d'une même forme forment une seule
+        entrée d'historique, jusqu'au prochain history.seal().
+        """
+        old = pose_of(shape)
+        if mode == "block":
+            moved = shape.move_to(x, y, self.width, self.height, self.shape_group)
+        else:
+            moved = shape.sweep_to(x, y, self.width, self.height, self.shape_group, slide=(mode == "slide"))
+        if moved:
+            self.history.record(PoseChange(shape, old, pose_of(shape)), merge=True)
+        return moved
+
+    def undo(self):
+        """
+        Annule la dernière opération. Renvoie les formes touchées (à redessiner).
+        """
+        command = self.history.undo()
+        return command.shapes if command is not None else ()
+
+    def redo(self):
+        command = self.history.redo()
+        return command.shapes if command is not None else ()
+
+    @staticmethod
+    def is_rotatable(shape):
+        return isinstance(shape, (RectangleShape, TriangleShape))
+
+    def rotate(self, shape, delta):
+        """
+        Tourne la forme de `delta` degrés sur place, ou lève RotationError
+        (collision ou sortie de la pièce) en la laissant inchangée.
+        """
+        if not self.is_rotatable(shape):
+            raise RotationError("Seuls les rectangles et triangles peuvent être tournés.")
+
+        old_angle, old_pose = shape.angle, shape._snapshot()
+        shape.angle = (shape.angle + delta) % 360
+        if not shape.move_to(shape.x, shape.y, self.width, self.height, self.shape_group):
+            shape.angle = old_angle
+            shape._restore(old_pose)
+            raise RotationError("La forme ne peut pas être tournée ici (collision ou hors pièce).")
+        self.history.record(PoseChange(shape, (shape.x, shape.y, old_angle), pose_of(shape)))
+        return shape.angle
+
+    def rotate_and_fit(self, shape, delta, max_distance=None):
+        """
+        Tourne la forme de `delta` degrés puis, si elle ne tient pas sur place,
+        la décale vers la position libre la plus proche (recherche en spirale,
+        jusqu'à `max_distance`, par défaut sa plus grande dimension).
+        Renvoie la nouvelle pose (x, y, angle) ou lève RotationError.
+        """
+        if not self.is_rotatable(shape):
+            raise RotationError("Seuls les rectangles et triangles peuvent être tournés.")
+
+        angle = (shape.angle + delta) % 360
+        if max_distance is None:
+            min_x, min_y, max_x, max_y = shape.get_bbox()
+            max_distance = math.ceil(max(max_x - min_x, max_y - min_y))
+        position = nearest_free_position(
+            shape, self.width, self.height, self.shape_group, max_distance, angle=angle
+        )
+        if position is None:
+            raise RotationError("Aucune position libre à proximité pour cet angle.")
+
+        old_angle, old_pose = shape.angle, shape._snapshot()
+        shape.angle = angle
+        if not shape.move_to(position[0], position[1], self.width, self.height, self.shape_group):
+            shape.angle = old_angle
+            shape._restore(old_pose)
+            raise RotationError("Aucune position libre à proximité pour cet angle.")
+        self.history.record(PoseChange(shape, (old_pose[0], old_pose[1], old_angle), pose_of(shape)))
+        return shape.x, shape.y, shape.angle
+
+    def shape_at(self, x, y):
+        """
+        Forme la plus haute (dernière ajoutée) contenant le point, ou None.
+        """
+        return self.shape_group.shape_at(x, y)
@@ -1,16 +1,354 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import count
+import gc
 import math
 
+from spatial import SpatialGrid
+from collision_cache import collision_cache
+from store import ShapeStore, RECTANGLE, CIRCLE, TRIANGLE
+from visitor import AreaCalculatorVisitor
+
+# Marge ajoutée aux boîtes englobantes lors de la phase large, pour que les
+# arrondis flottants ne fassent jamais manquer un contact au test exact.
+BBOX_EPSILON = 1e-6
+
+# Compteur global : deux états géométriques distincts (même de deux formes
+# différentes) n'ont jamais le même numéro de version.
+_versions = count(1)
+
+
+class GeometryAttribute:
+    """
+    Attribut géométrique (position, dimension ou angle).
+    Toute affectation invalide le cache de géométrie de la forme
+    et lui attribue une nouvelle version.
+
+    Tant que la forme appartient à un ShapeGroup, la valeur est lue et
+    écrite dans la colonne `column` du ShapeStore du groupe ; sinon dans
+    un slot privé de la forme.
+    """
+
+    def __init__(self, column):
+        self.column = column
+
+    def __set_name__(self, owner, name):
+        self.slot = owner.__dict__["_" + name]
+        owner._geometry_fields = owner.__dict__.get("_geometry_fields", ()) + (self,)
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        store = obj._store
+        if store is None:
+            return self.slot.__get__(obj)
+        return getattr(store, self.column)[obj._row]
+
+    def __set__(self, obj, value):
+        store = obj._store
+        if store is None:
+            self.slot.__set__(obj, value)
+        else:
+            getattr(store, self.column)[obj._row] = value
+        obj._geometry = None
+        obj.version = next(_versions)
+
+
+def _ray_circle(px, py, ex, ey, cx, cy, radius):
+    # Plus petit t >= 0 où p + t·e est dans le disque (c, radius)
+    wx, wy = px - cx, py - cy
+    c = wx * wx + wy * wy - radius * radius
+    if c <= 0:
+        return 0.0
+    a = ex * ex + ey * ey
+    b = wx * ex + wy * ey
+    if b >= 0 or a == 0:
+        return math.inf  # le point s'éloigne
+    disc = b * b - a * c
+    if disc < 0:
+        return math.inf
+    return (-b - math.sqrt(disc)) / a
+
+
+def _ray_polygon(px, py, ex, ey, verts, radius):
+    """
+    Plus petit t >= 0 où le point p + t·e est à au plus `radius` du polygone
+    convexe `verts` (math.inf si jamais) : entrée dans le polygone arrondi,
+    dont le bord est fait des arêtes décalées de `radius` et des disques
+    centrés sur les sommets.
+    """
+    n = len(verts)
+    inside = True
+    best = math.inf
+    sign = 0
+    for i in range(n):
+        ax, ay = verts[i]
+        bx, by = verts[(i + 1) % n]
+        ux, uy = bx - ax, by - ay
+        wx, wy = px - ax, py - ay
+        side = ux * wy - uy * wx
+        if side != 0:
+            if sign == 0:
+                sign = side
+            elif (side > 0) != (sign > 0):
+                inside = False
+        length_sq = ux * ux + uy * uy
+        if length_sq == 0:
+            continue
+        # Distance du point de départ à l'arête
+        k = min(1.0, max(0.0, (wx * ux + wy * uy) / length_sq))
+        if (wx - k * ux) ** 2 + (wy - k * uy) ** 2 <= radius * radius:
+            return 0.0
+
+        best = min(best, _ray_circle(px, py, ex, ey, ax, ay, radius))
+        denom = ex * uy - ey * ux
+        if denom == 0:
+            continue
+        scale = radius / math.sqrt(length_sq)
+        for sx, sy in ((ax - uy * scale, ay + ux * scale), (ax + uy * scale, ay - ux * scale)):
+            wx, wy = sx - px, sy - py
+            t = (wx * uy - wy * ux) / denom
+            s = (wx * ey - wy * ex) / denom
+            if t >= 0 and 0 <= s <= 1:
+                best = min(best, t)
+    return 0.0 if inside else best
+
+
+def _time_of_impact(shape, other, dx, dy):
+    """
+    Plus petite fraction t >= 0 telle que `shape`, translatée de t·(dx, dy),
+    touche `other` (math.inf si elle ne le touche jamais).
+
+    Entre deux polygones, la projection de `shape` sur chaque axe séparateur
+    avance linéairement avec t : chaque axe donne un intervalle de t où les
+    projections se chevauchent, et le contact commence au début de leur
+    intersection. Avec un cercle, c'est l'entrée du centre (mouvement
+    relatif) dans l'autre forme grossie du rayon.
+    """
+    verts, axes, _, (cx, cy) = shape._cached_geometry()
+    o_verts, o_axes, _, (ox, oy) = other._cached_geometry()
+    if isinstance(shape, CircleShape):
+        if isinstance(other, CircleShape):
+            return _ray_circle(cx, cy, dx, dy, ox, oy, shape.radius + other.radius)
+        return _ray_polygon(cx, cy, dx, dy, o_verts, shape.radius)
+    if isinstance(other, CircleShape):
+        return _ray_polygon(ox, oy, -dx, -dy, verts, other.radius)
+
+    t_enter, t_exit = -math.inf, math.inf
+    for ax, ay in (*axes, *o_axes):
+        projections = [px * ax + py * ay for px, py in verts]
+        o_projections = [px * ax + py * ay for px, py in o_verts]
+        min1, max1 = min(projections), max(projections)
+        min2, max2 = min(o_projections), max(o_projections)
+        speed = dx * ax + dy * ay
+        if speed == 0:
+            if max1 < min2 or max2 < min1:
+                return math.inf
+            continue
+        low, high = (min2 - max1) / speed, (max2 - min1) / speed
+        if low > high:
+            low, high = high, low
+        t_enter, t_exit = max(t_enter, low), min(t_exit, high)
+        if t_enter > t_exit:
+            return math.inf
+    if t_exit < 0:
+        return math.inf
+    return max(t_enter, 0.0)
+
 
 class Shape(ABC):
+    __slots__ = (
+        "name", "color", "group", "version", "_geometry", "id", "label_id", "_store", "_row",
+        "_poses",
+    )
+
+    # Nombre de poses récentes mémorisées par forme (voir _recall_pose)
+    POSE_MEMORY = 8
+
     def __init__(self, name, color):
         self.name = name
         self.color = color
+        self.group = None  # ShapeGroup qui indexe la forme
+        self._store = None  # ShapeStore du groupe, qui porte alors la géométrie
+        self._row = None
+        self._poses = None
+        self.version = next(_versions)
+        self._geometry = None
+        self.id = None        # élément du canvas (polygone ou ovale)
+        self.label_id = None  # texte du nom sur le canvas
+
+    def _cached_geometry(self):
+        """
+        Sommets, normales d'arêtes, boîte englobante et centre en coordonnées
+        de la pièce, recalculés seulement après une modification géométrique.
+        """
+        if self._geometry is None:
+            self._geometry = self._compute_geometry()
+        return self._geometry
+
+    @abstractmethod
+    def _compute_geometry(self):
+        """
+        (sommets, normales d'arêtes, boîte englobante, centre) de la forme.
+        """
+
+    def get_bbox(self):
+        return self._cached_geometry()[2]
+
+    def _snapshot(self):
+        return self.x, self.y, self.version, self._geometry
+
+    def _restore(self, snapshot):
+        """
+        Annule un déplacement d'essai en réutilisant la géométrie en cache.
+        """
+        self.x, self.y, version, geometry = snapshot
+        self.version, self._geometry = version, geometry
+
+    def _recall_pose(self):
+        """
+        Si la forme revient dans une pose récente (mêmes position, dimensions
+        et angle), elle reprend la version et la géométrie de cette pose :
+        les résultats de collision en cache pour cette version restent valables.
+        """
+        pose = tuple(field.__get__(self) for field in self._geometry_fields)
+        if self._poses is None:
+            self._poses = OrderedDict()
+        entry = self._poses.get(pose)
+        if entry is not None:
+            self._poses.move_to_end(pose)
+            self.version, self._geometry = entry
+            return
+        self._poses[pose] = (self.version, self._cached_geometry())
+        if len(self._poses) > self.POSE_MEMORY:
+            self._poses.popitem(last=False)
+
+    def _neighbours(self, all_shapes):
+        """
+        Phase large : si les formes viennent d'un ShapeGroup, on ne garde que
+        celles dont la boîte englobante chevauche celle de cette forme.
+        """
+        if isinstance(all_shapes, ShapeGroup):
+            min_x, min_y, max_x, max_y = self.get_bbox()
+            return all_shapes.query((
+                min_x - BBOX_EPSILON, min_y - BBOX_EPSILON,
+                max_x + BBOX_EPSILON, max_y + BBOX_EPSILON,
+            ))
+        return all_shapes
+
+    def _moved(self):
+        if self.group is not None:
+            self.group.update(self)
+
+    def sweep_to(self, x, y, max_width, max_height, all_shapes, slide=False, tolerance=0.5):
+        """
+        Déplace la forme vers (x, y) en suivant le trajet : si un obstacle
+        (ou un bord de la pièce) le coupe, la forme s'arrête avant le premier
+        contact, à `tolerance` près ; avec `slide`, le reste du déplacement
+        est ensuite tenté axe par axe pour glisser le long de l'obstacle.
+        Renvoie True si la forme a bougé.
+        """
+        if math.hypot(x - self.x, y - self.y) < tolerance:
+            return self.move_to(x, y, max_width, max_height, all_shapes)
+
+        moved = self._advance(x - self.x, y - self.y, max_width, max_height, all_shapes, tolerance)
+        if slide:
+            rest_x, rest_y = x - self.x, y - self.y
+            if self._advance(rest_x, 0, max_width, max_height, all_shapes, tolerance):
+                moved = True
+            if self._advance(0, rest_y, max_width, max_height, all_shapes, tolerance):
+                moved = True
+        return moved
+
+    def _advance(self, dx, dy, max_width, max_height, all_shapes, tolerance):
+        """
+        Avance le long de (dx, dy) jusqu'au premier contact, calculé
+        analytiquement contre les bords de la pièce et contre chaque forme
+        que la boîte balayée touche (voir _time_of_impact) : aucun obstacle,
+        même fin ou tourné, ne peut être traversé. La forme s'arrête
+        `tolerance` avant le contact (ou à mi-chemin s'il est plus proche).
+        """
+        length = math.hypot(dx, dy)
+        if length < tolerance:
+            return False
+        min_x, min_y, max_x, max_y = self.get_bbox()
+
+        t = 1.0
+        for low, high, d, limit in ((min_x, max_x, dx, max_width), (min_y, max_y, dy, max_height)):
+            if d > 0:
+                t = min(t, (limit - high) / d)
+            elif d < 0:
+                t = min(t, low / -d)
+
+        swept = (
+            min(min_x, min_x + dx) - BBOX_EPSILON, min(min_y, min_y + dy) - BBOX_EPSILON,
+            max(max_x, max_x + dx) + BBOX_EPSILON, max(max_y, max_y + dy) + BBOX_EPSILON,
+        )
+        others = all_shapes.query(swept) if isinstance(all_shapes, ShapeGroup) else all_shapes
+        for other in others:
+            if other is not self:
+                t = min(t, _time_of_impact(self, other, dx, dy))
+
+        start_x, start_y = self.x, self.y
+        if t >= 1 and self.move_to(start_x + dx, start_y + dy, max_width, max_height, all_shapes):
+            return True
+        t = min(t, 1.0)
+        t -= min(tolerance / length, t / 2)
+        while t * length > BBOX_EPSILON:
+            if self.move_to(start_x + t * dx, start_y + t * dy, max_width, max_height, all_shapes):
+                return True
+            t /= 2  # contact rasant refusé par le test exact (arrondis)
+        return False
 
     @abstractmethod
-    def draw(self, canvas):
+    def draw(self, canvas, view=None):
         pass
 
+    def _screen_coords(self, view):
+        # Coordonnées canvas, transformées par la vue (viewport.Viewport) s'il y en a une
+        coords = self._canvas_coords()
+        return coords if view is None else view.to_screen(coords)
+
+    def _draw_label(self, canvas, view):
+        """
+        Crée ou met à jour le nom de la forme ; il est retiré quand la vue
+        est trop dézoomée pour qu'il soit lisible.
+        """
+        if view is not None and not view.show_labels:
+            if self.label_id is not None:
+                canvas.delete(self.label_id)
+                self.label_id = None
+            return
+        cx, cy = self.get_center()
+        if view is not None:
+            cx, cy = view.point_to_screen(cx, cy)
+        if self.label_id is None:
+            self.label_id = canvas.create_text(cx, cy, text=self.name)
+        else:
+            canvas.coords(self.label_id, cx, cy)
+            canvas.itemconfig(self.label_id, text=self.name)
+
+    def refresh(self, canvas, view=None):
+        """
+        Met à jour les éléments déjà présents sur le canvas (coordonnées,
+        couleur, nom) sans les recréer ; dessine la forme si besoin.
+        """
+        if self.id is None:
+            self.draw(canvas, view)
+            return
+        canvas.coords(self.id, *self._screen_coords(view))
+        canvas.itemconfig(self.id, fill=self.color)
+        self._draw_label(canvas, view)
+
+    def erase(self, canvas):
+        if self.id is not None:
+            canvas.delete(self.id)
+        if self.label_id is not None:
+            canvas.delete(self.label_id)
+        self.id = None
+        self.label_id = None
+
     @abstractmethod
     def contains(self, x, y):
         pass
@@ -29,6 +367,15 @@ class Shape(ABC):
 
 
 class RectangleShape(Shape):
+    __slots__ = ("_x", "_y", "_width", "_height", "_angle")
+    KIND = RECTANGLE
+
+    x = GeometryAttribute("x")
+    y = GeometryAttribute("y")
+    width = GeometryAttribute("a")
+    height = GeometryAttribute("b")
+    angle = GeometryAttribute("angle")
+
     def __init__(self, name, x, y, width, height, color, angle=0):
         super().__init__(name, color)
         self.x = x
@@ -38,12 +385,20 @@ class RectangleShape(Shape):
         self.angle = angle  # en degrés
 
     def get_center(self):
-        cx = self.x + self.width / 2
-        cy = self.y + self.height / 2
-        return cx, cy
+        return self._cached_geometry()[3]
 
     def get_corners(self):
-        cx, cy = self.get_center()
+        """
+        Coins en coordonnées de la pièce (tuple en cache).
+        """
+        return self._cached_geometry()[0]
+
+    def get_axes(self):
+        return self._cached_geometry()[1]
+
+    def _compute_geometry(self):
+        cx = self.x + self.width / 2
+        cy = self.y + self.height / 2
         θ = math.radians(self.angle)
         cos_t = math.cos(θ)
         sin_t = math.sin(θ)
@@ -63,16 +418,20 @@ class RectangleShape(Shape):
             qy = dx * sin_t + dy * cos_t + cy
             rotated.append((qx, qy))
 
-        return rotated
+        xs = [px for (px, _) in rotated]
+        ys = [py for (_, py) in rotated]
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        return tuple(rotated), tuple(self._axes_for_SAT(rotated)), bbox, (cx, cy)
 
-    def draw(self, canvas):
-        corners = self.get_corners()
+    def _canvas_coords(self):
         coords = []
-        for (px, py) in corners:
+        for (px, py) in self.get_corners():
             coords.extend([px, py])
-        self.id = canvas.create_polygon(coords, fill=self.color, outline="black")
-        cx, cy = self.get_center()
-        self.label_id = canvas.create_text(cx, cy, text=self.name)
+        return coords
+
+    def draw(self, canvas, view=None):
+        self.id = canvas.create_polygon(self._screen_coords(view), fill=self.color, outline="black")
+        self._draw_label(canvas, view)
 
     def contains(self, x, y):
         corners = self.get_corners()
@@ -88,25 +447,23 @@ class RectangleShape(Shape):
         return (s0 >= 0 and s1 >= 0 and s2 >= 0 and s3 >= 0) or (s0 <= 0 and s1 <= 0 and s2 <= 0 and s3 <= 0)
 
     def move_to(self, x, y, max_width, max_height, all_shapes):
-        old_x, old_y = self.x, self.y
+        old_pose = self._snapshot()
         self.x, self.y = x, y
+        self._recall_pose()
 
-        corners = self.get_corners()
-        xs = [px for (px, _) in corners]
-        ys = [py for (_, py) in corners]
-        min_x, max_x = min(xs), max(xs)
-        min_y, max_y = min(ys), max(ys)
+        min_x, min_y, max_x, max_y = self.get_bbox()
         if min_x < 0 or min_y < 0 or max_x > max_width or max_y > max_height:
-            self.x, self.y = old_x, old_y
+            self._restore(old_pose)
             return False
 
-        for other in all_shapes:
+        for other in self._neighbours(all_shapes):
             if other is self:
                 continue
-            if self.intersects_with(other):
-                self.x, self.y = old_x, old_y
+            if collision_cache.intersects(self, other):
+                self._restore(old_pose)
                 return False
 
+        self._moved()
         return True
 
     def accept(self, visitor):
@@ -138,9 +495,7 @@ class RectangleShape(Shape):
             corners1 = self.get_corners()
             corners2 = other.get_corners()
 
-            axes1 = self._axes_for_SAT(corners1)
-            axes2 = other._axes_for_SAT(corners2)
-            axes = axes1[:2] + axes2[:2]
+            axes = self.get_axes()[:2] + other.get_axes()[:2]
 
             for axis in axes:
                 min1, max1 = self._project_onto_axis(corners1, axis)
@@ -150,8 +505,7 @@ class RectangleShape(Shape):
             return True
 
         if isinstance(other, CircleShape):
-            cx = other.x + other.radius
-            cy = other.y + other.radius
+            cx, cy = other.get_center()
             r = other.radius
             if self.contains(cx, cy):
                 return True
@@ -184,9 +538,7 @@ class RectangleShape(Shape):
             verts1 = self.get_corners()
             verts2 = other.get_vertices()
 
-            axes1 = self._axes_for_SAT(verts1)
-            axes2 = other._axes_for_SAT(verts2)
-            axes = axes1[:2] + axes2
+            axes = self.get_axes()[:2] + other.get_axes()
 
             for axis in axes:
                 min1, max1 = self._project_onto_axis(verts1, axis)
@@ -199,37 +551,50 @@ class RectangleShape(Shape):
 
 
 class CircleShape(Shape):
+    __slots__ = ("_x", "_y", "_radius")
+    KIND = CIRCLE
+
+    x = GeometryAttribute("x")
+    y = GeometryAttribute("y")
+    radius = GeometryAttribute("a")
+
     def __init__(self, name, x, y, radius, color):
         super().__init__(name, color)
         self.x, self.y = x, y
         self.radius = radius
 
-    def draw(self, canvas):
-        self.id = canvas.create_oval(
-            self.x, self.y,
-            self.x + 2 * self.radius, self.y + 2 * self.radius,
-            fill=self.color
-        )
-        self.label_id = canvas.create_text(
-            self.x + self.radius, self.y + self.radius,
-            text=self.name
-        )
+    def get_center(self):
+        return self._cached_geometry()[3]
+
+    def _compute_geometry(self):
+        bbox = (self.x, self.y, self.x + 2 * self.radius, self.y + 2 * self.radius)
+        return None, None, bbox, (self.x + self.radius, self.y + self.radius)
+
+    def _canvas_coords(self):
+        return self.get_bbox()
+
+    def draw(self, canvas, view=None):
+        self.id = canvas.create_oval(*self._screen_coords(view), fill=self.color)
+        self._draw_label(canvas, view)
 
     def contains(self, x, y):
-        cx, cy = self.x + self.radius, self.y + self.radius
+        cx, cy = self.get_center()
         return (x - cx)**2 + (y - cy)**2 <= self.radius**2
 
     def move_to(self, x, y, max_width, max_height, all_shapes):
         if x < 0 or y < 0 or (x + 2 * self.radius) > max_width or (y + 2 * self.radius) > max_height:
             return False
 
-        old_x, old_y = self.x, self.y
+        old_pose = self._snapshot()
         self.x, self.y = x, y
+        self._recall_pose()
 
-        for shape in all_shapes:
-            if shape is not self and self.intersects_with(shape):
-                self.x, self.y = old_x, old_y
+        for shape in self._neighbours(all_shapes):
+            if shape is not self and collision_cache.intersects(self, shape):
+                self._restore(old_pose)
                 return False
+
+        self._moved()
         return True
 
     def accept(self, visitor):
@@ -237,10 +602,8 @@ class CircleShape(Shape):
 
     def intersects_with(self, other):
         if isinstance(other, CircleShape):
-            cx1 = self.x + self.radius
-            cy1 = self.y + self.radius
-            cx2 = other.x + other.radius
-            cy2 = other.y + other.radius
+            cx1, cy1 = self.get_center()
+            cx2, cy2 = other.get_center()
             dx = cx1 - cx2
             dy = cy1 - cy2
             dist_sq = dx * dx + dy * dy
@@ -253,6 +616,15 @@ class CircleShape(Shape):
 
 
 class TriangleShape(Shape):
+    __slots__ = ("_x", "_y", "_base", "_height", "_angle")
+    KIND = TRIANGLE
+
+    x = GeometryAttribute("x")
+    y = GeometryAttribute("y")
+    base = GeometryAttribute("a")
+    height = GeometryAttribute("b")
+    angle = GeometryAttribute("angle")
+
     def __init__(self, name, x, y, base, height, color, angle=0):
         super().__init__(name, color)
         self.x = x
@@ -262,15 +634,23 @@ class TriangleShape(Shape):
         self.angle = angle  # en degrés
 
     def get_center(self):
-        cx = self.x + (self.base / 2)
-        cy = self.y + (self.height * 2/3)
-        return cx, cy
+        return self._cached_geometry()[3]
 
     def get_vertices(self):
+        """
+        Sommets en coordonnées de la pièce (tuple en cache).
+        """
+        return self._cached_geometry()[0]
+
+    def get_axes(self):
+        return self._cached_geometry()[1]
+
+    def _compute_geometry(self):
         A = (self.x, self.y + self.height)
         B = (self.x + self.base / 2, self.y)
         C = (self.x + self.base, self.y + self.height)
-        cx, cy = self.get_center()
+        cx = self.x + (self.base / 2)
+        cy = self.y + (self.height * 2/3)
         θ = math.radians(self.angle)
         cos_t = math.cos(θ)
         sin_t = math.sin(θ)
@@ -282,16 +662,21 @@ class TriangleShape(Shape):
             qy = dx * sin_t + dy * cos_t + cy
             return (qx, qy)
 
-        return [rotate_point(*A), rotate_point(*B), rotate_point(*C)]
+        verts = [rotate_point(*A), rotate_point(*B), rotate_point(*C)]
+        xs = [px for (px, _) in verts]
+        ys = [py for (_, py) in verts]
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        return tuple(verts), tuple(self._axes_for_SAT(verts)), bbox, (cx, cy)
 
-    def draw(self, canvas):
-        verts = self.get_vertices()
+    def _canvas_coords(self):
         coords = []
-        for (px, py) in verts:
+        for (px, py) in self.get_vertices():
             coords.extend([px, py])
-        self.id = canvas.create_polygon(coords, fill=self.color, outline="black")
-        cx, cy = self.get_center()
-        self.label_id = canvas.create_text(cx, cy, text=self.name)
+        return coords
+
+    def draw(self, canvas, view=None):
+        self.id = canvas.create_polygon(self._screen_coords(view), fill=self.color, outline="black")
+        self._draw_label(canvas, view)
 
     def contains(self, x, y):
         verts = self.get_vertices()
@@ -308,23 +693,23 @@ class TriangleShape(Shape):
         return abs((A1 + A2 + A3) - A_tot) < 1e-6
 
     def move_to(self, x, y, max_width, max_height, all_shapes):
-        old_x, old_y = self.x, self.y
+        old_pose = self._snapshot()
         self.x, self.y = x, y
+        self._recall_pose()
 
-        verts = self.get_vertices()
-        xs = [px for (px, _) in verts]
-        ys = [py for (_, py) in verts]
-        if min(xs) < 0 or min(ys) < 0 or max(xs) > max_width or max(ys) > max_height:
-            self.x, self.y = old_x, old_y
+        min_x, min_y, max_x, max_y = self.get_bbox()
+        if min_x < 0 or min_y < 0 or max_x > max_width or max_y > max_height:
+            self._restore(old_pose)
             return False
 
-        for other in all_shapes:
+        for other in self._neighbours(all_shapes):
             if other is self:
                 continue
-            if self.intersects_with(other):
-                self.x, self.y = old_x, old_y
+            if collision_cache.intersects(self, other):
+                self._restore(old_pose)
                 return False
 
+        self._moved()
         return True
 
     def accept(self, visitor):
@@ -356,9 +741,7 @@ class TriangleShape(Shape):
 
         if isinstance(other, TriangleShape):
             verts2 = other.get_vertices()
-            axes1 = self._axes_for_SAT(verts1)
-            axes2 = other._axes_for_SAT(verts2)
-            axes = axes1 + axes2
+            axes = self.get_axes() + other.get_axes()
             for axis in axes:
                 min1, max1 = self._project_onto_axis(verts1, axis)
                 min2, max2 = other._project_onto_axis(verts2, axis)
@@ -368,9 +751,7 @@ class TriangleShape(Shape):
 
         if isinstance(other, RectangleShape):
             verts2 = other.get_corners()
-            axes1 = self._axes_for_SAT(verts1)
-            axes2 = other._axes_for_SAT(verts2)
-            axes = axes1 + axes2
+            axes = self.get_axes() + other.get_axes()
             for axis in axes:
                 min1, max1 = self._project_onto_axis(verts1, axis)
                 min2, max2 = other._project_onto_axis(verts2, axis)
@@ -379,8 +760,7 @@ class TriangleShape(Shape):
             return True
 
         if isinstance(other, CircleShape):
-            cx = other.x + other.radius
-            cy = other.y + other.radius
+            cx, cy = other.get_center()
             r = other.radius
 
             if self.contains(cx, cy):
@@ -412,23 +792,245 @@ class TriangleShape(Shape):
         return False
 
 
+@contextmanager
+def _bulk_allocation():
+    # Création de milliers d'objets d'un coup : sans passes du ramasse-miettes
+    # au milieu (elles reparcourraient tout le tas à chaque génération)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 class ShapeGroup(Shape):
-    def __init__(self):
+    def __init__(self, cell_size=64):
         super().__init__("Group", "white")
-        self.children = []
-
-    def add(self, shape):
-        self.children.append(shape)
+        # Formes du groupe (clés d'un dict : retrait en O(1)), rangées par
+        # rang d'empilement ; `children` en est une copie en liste, refaite
+        # seulement après une modification
+        self._children = {}
+        self._children_list = []
+        self._sorted = True
+        self.store = ShapeStore()  # géométrie des enfants, par colonnes
+        self.index = SpatialGrid(cell_size)
+        self.listeners = []
+        # Aires tenues à jour à chaque ajout / suppression
+        self.areas = {}
+        self.total_area = 0
+        # Rang d'empilement (ordre d'ajout) : la forme de plus haut rang est dessus
+        self.order = {}
+        self._next_order = 0
+
+    @property
+    def children(self):
+        """
+        Formes du groupe, de la plus basse à la plus haute.
+        """
+        if self._children_list is None:
+            if not self._sorted:
+                self._children = dict.fromkeys(sorted(self._children, key=self.order.__getitem__))
+                self._sorted = True
+            self._children_list = list(self._children)
+        return self._children_list
+
+    def add_listener(self, listener):
+        """
+        Abonne un observateur (shape_added, shape_removed, shape_moved)
+        aux modifications du groupe.
+        """
+        self.listeners.append(listener)
+        for shape in self.children:
+            listener.shape_added(shape)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def add(self, shape, rank=None):
+        """
+        Ajoute une forme au-dessus des autres, ou à son rang d'empilement
+        `rank` d'avant un retrait (annulation).
+        """
+        if rank is None:
+            rank = self._next_order
+            self._next_order += 1
+        elif self._children and rank < self.order[next(reversed(self._children))]:
+            self._sorted = False  # remise en place au prochain accès à children
+        self._children[shape] = None
+        self._children_list = None
+        shape.group = self
+        self.order[shape] = rank
+        self.store.attach(shape)
+        # Boîte calculée sur la ligne du store : sommets et normales ne sont
+        # construits qu'au premier test de collision
+        self.index.insert(shape, self.store.row_bbox(shape._row))
+        visitor = AreaCalculatorVisitor()
+        shape.accept(visitor)
+        self.areas[shape] = visitor.get_total_area()
+        self.total_area += self.areas[shape]
+        self._changed()
+        for listener in self.listeners:
+            listener.shape_added(shape)
+
+    def add_many(self, shapes):
+        """
+        Ajout en bloc de formes déjà positionnées (chargement d'un plan),
+        sans aucun test de collision : la validation éventuelle se fait
+        ensuite en une seule passe.
+        """
+        start = len(self.store)
+        with _bulk_allocation():
+            for shape in shapes:
+                self.store.attach(shape)
+            self._register(shapes, start)
+
+    def add_columns(self, kind, x, y, a, b, angle, names, colors):
+        """
+        Ajout en bloc de formes décrites par colonnes (tableaux array) :
+        les lignes sont copiées d'un coup dans le ShapeStore et chaque forme
+        n'est créée que comme vue sur sa ligne. Renvoie les formes créées.
+        """
+        classes = {RECTANGLE: RectangleShape, CIRCLE: CircleShape, TRIANGLE: TriangleShape}
+        start = self.store.extend(kind, x, y, a, b, angle)
+        shapes = []
+        with _bulk_allocation():
+            for row, (k, name, color) in enumerate(zip(kind, names, colors), start):
+                cls = classes[k]
+                shape = cls.__new__(cls)
+                Shape.__init__(shape, name, color)
+                shape._store = self.store
+                shape._row = row
+                shapes.append(shape)
+            self.store.shapes.extend(shapes)
+            self._register(shapes, start)
+        return shapes
+
+    def _register(self, shapes, start):
+        # Boîtes calculées sur les colonnes (vectorisé si NumPy est
+        # disponible), sans construire le cache de géométrie de chaque forme
+        try:
+            bboxes = map(tuple, self.store.bboxes(start).tolist())
+        except ImportError:
+            bboxes = (self.store.row_bbox(shape._row) for shape in shapes)
+
+        self._children.update(dict.fromkeys(shapes))
+        self._children_list = None
+        self.index.insert_many(shapes, bboxes)
+        row_area = self.store.row_area
+        for rank, shape in enumerate(shapes, self._next_order):
+            shape.group = self
+            self.order[shape] = rank
+            area = row_area(shape._row)
+            self.areas[shape] = area
+            self.total_area += area
+        self._next_order += len(shapes)
+        self._changed()
+        for listener in self.listeners:
+            for shape in shapes:
+                listener.shape_added(shape)
 
     def remove(self, shape):
-        self.children.remove(shape)
+        """
+        Retire une forme et renvoie son rang d'empilement (voir add).
+        """
+        del self._children[shape]
+        self._children_list = None
+        self.index.remove(shape)
+        self.store.detach(shape)
+        shape.group = None
+        rank = self.order.pop(shape)
+        self.total_area -= self.areas.pop(shape)
+        if not self._children:
+            self.total_area = 0  # pas de dérive d'arrondi sur un groupe vide
+        self._changed()
+        for listener in self.listeners:
+            listener.shape_removed(shape)
+        return rank
+
+    def update(self, shape):
+        """
+        À appeler après tout déplacement ou rotation d'une forme du groupe.
+        """
+        self.index.update(shape, shape.get_bbox())
+        self._changed()
+        for listener in self.listeners:
+            listener.shape_moved(shape)
+
+    def _changed(self):
+        # Nouvelle version du groupe à chaque ajout, retrait ou déplacement :
+        # (placement) les copies envoyées aux processus sont à refaire
+        self.version = next(_versions)
+
+    def query(self, bbox):
+        return self.index.query(bbox)
+
+    def shape_at(self, x, y):
+        """
+        Forme la plus haute (dernière ajoutée) contenant le point, ou None.
+        Seules les formes dont la boîte contient le point sont testées,
+        de la plus haute à la plus basse.
+        """
+        candidates = self.index.query_point(x, y)
+        candidates.sort(key=self.order.__getitem__, reverse=True)
+        for shape in candidates:
+            if shape.contains(x, y):
+                return shape
+        return None
+
+    def validate_layout(self, width=None, height=None):
+        """
+        Vérification complète du groupe par balayage (sort and sweep) :
+        les boîtes englobantes sont triées sur x, et seules les paires dont
+        les intervalles se chevauchent en x puis en y (contact compris) passent
+        au test exact de intersects_with, dans les deux sens.
+
+        Renvoie (paires en conflit, formes hors de la pièce) ; les bornes ne
+        sont vérifiées que si `width` et `height` sont donnés.
+        """
+        boxes = sorted(
+            ((self.index.bbox_of(shape), i, shape) for i, shape in enumerate(self.children)),
+            key=lambda entry: entry[0][0],
+        )
 
-    def draw(self, canvas):
+        pairs = []
+        active = []  # (max_x, min_y, max_y, forme), formes dont l'intervalle x est encore ouvert
+        for (min_x, min_y, max_x, max_y), _, shape in boxes:
+            start = min_x - BBOX_EPSILON
+            if active and any(entry[0] < start for entry in active):
+                active = [entry for entry in active if entry[0] >= start]
+            low, high = min_y - BBOX_EPSILON, max_y + BBOX_EPSILON
+            for _, o_min_y, o_max_y, other in active:
+                if o_min_y <= high and o_max_y >= low and collision_cache.collides(other, shape):
+                    pairs.append((other, shape))
+            active.append((max_x, min_y, max_y, shape))
+
+        out_of_bounds = []
+        if width is not None and height is not None:
+            out_of_bounds = sorted(self.store.out_of_bounds(width, height), key=self.order.__getitem__)
+        return pairs, out_of_bounds
+
+    def get_total_area(self):
+        return self.total_area
+
+    def get_area_details(self):
+        return [(shape.name, self.areas[shape]) for shape in self.children]
+
+    def draw(self, canvas, view=None):
         for shape in self.children:
-            shape.draw(canvas)
+            shape.draw(canvas, view)
+
+    def refresh(self, canvas, view=None):
+        for shape in self.children:
+            shape.refresh(canvas, view)
+
+    def erase(self, canvas):
+        for shape in self.children:
+            shape.erase(canvas)
 
     def contains(self, x, y):
-        return any(shape.contains(x, y) for shape in self.children)
+        return self.shape_at(x, y) is not None
 
     def move_to(self, x, y, max_width, max_height, all_shapes):
         pass
@@ -439,3 +1041,38 @@ class ShapeGroup(Shape):
 
     def intersects_with(self, other):
         return False
+
+    def _compute_geometry(self):
+        # Pas de sommets propres ; get_bbox est redéfinie et ne passe pas par le cache
+        min_x, min_y, max_x, max_y = self.get_bbox()
+        return None, None, (min_x, min_y, max_x, max_y), ((min_x + max_x) / 2, (min_y + max_y) / 2)
+
+    def get_bbox(self):
+        if not self._children:
+            return 0, 0, 0, 0
+        boxes = [self.index.bbox_of(shape) for shape in self.children]
+        return (
+            min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes),
+        )
+
+
+def shape_to_record(shape):
+    """
+    Forme réduite à sa géométrie : (type, x, y, dimension 1, dimension 2, angle).
+    Format compact pour l'envoi à d'autres processus.
+    """
+    if isinstance(shape, RectangleShape):
+        return "rectangle", shape.x, shape.y, shape.width, shape.height, shape.angle
+    if isinstance(shape, CircleShape):
+        return "circle", shape.x, shape.y, shape.radius, 0, 0
+    return "triangle", shape.x, shape.y, shape.base, shape.height, shape.angle
+
+
+def shape_from_record(record, name="", color="white"):
+    kind, x, y, a, b, angle = record
+    if kind == "rectangle":
+        return RectangleShape(name, x, y, a, b, color, angle=angle)
+    if kind == "circle":
+        return CircleShape(name, x, y, a, color)
+    return TriangleShape(name, x, y, a, b, color, angle=angle)
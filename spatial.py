@@ -0,0 +1,114 @@
+import math
+
+
+class SpatialGrid:
+    """
+    Index spatial en grille uniforme, indexé sur la boîte englobante
+    (min_x, min_y, max_x, max_y) de chaque forme.
+    Une forme est enregistrée dans toutes les cellules que couvre sa boîte.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}  # forme -> (boîte, cellules couvertes)
+
+    def _cell_range(self, bbox):
+        size = self.cell_size
+        min_x, min_y, max_x, max_y = bbox
+        return (
+            math.floor(min_x / size), math.floor(min_y / size),
+            math.floor(max_x / size), math.floor(max_y / size),
+        )
+
+    def insert(self, item, bbox):
+        c0, r0, c1, r1 = self._cell_range(bbox)
+        keys = []
+        for cx in range(c0, c1 + 1):
+            for cy in range(r0, r1 + 1):
+                key = (cx, cy)
+                self.cells.setdefault(key, set()).add(item)
+                keys.append(key)
+        self.entries[item] = (bbox, keys)
+
+    def insert_many(self, items, bboxes):
+        """
+        Insertion en bloc (même résultat que insert pour chaque élément),
+        avec un raccourci pour les boîtes contenues dans une seule cellule.
+        """
+        size = self.cell_size
+        cells = self.cells
+        entries = self.entries
+        floor = math.floor
+        for item, bbox in zip(items, bboxes):
+            min_x, min_y, max_x, max_y = bbox
+            c0, r0 = floor(min_x / size), floor(min_y / size)
+            c1, r1 = floor(max_x / size), floor(max_y / size)
+            if c0 == c1 and r0 == r1:
+                key = (c0, r0)
+                bucket = cells.get(key)
+                if bucket is None:
+                    cells[key] = bucket = set()
+                bucket.add(item)
+                entries[item] = (bbox, [key])
+                continue
+            keys = []
+            for cx in range(c0, c1 + 1):
+                for cy in range(r0, r1 + 1):
+                    key = (cx, cy)
+                    cells.setdefault(key, set()).add(item)
+                    keys.append(key)
+            entries[item] = (bbox, keys)
+
+    def remove(self, item):
+        entry = self.entries.pop(item, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            bucket = self.cells[key]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[key]
+
+    def update(self, item, bbox):
+        entry = self.entries.get(item)
+        if entry is not None and self._cell_range(entry[0]) == self._cell_range(bbox):
+            # Même cellules : on ne met à jour que la boîte
+            self.entries[item] = (bbox, entry[1])
+            return
+        self.remove(item)
+        self.insert(item, bbox)
+
+    def bbox_of(self, item):
+        return self.entries[item][0]
+
+    def query(self, bbox):
+        """
+        Renvoie les éléments dont la boîte chevauche ou touche `bbox`
+        (bornes incluses, un contact compte comme une collision).
+        """
+        min_x, min_y, max_x, max_y = bbox
+        c0, r0, c1, r1 = self._cell_range(bbox)
+        found = set()
+        for cx in range(c0, c1 + 1):
+            for cy in range(r0, r1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+
+        result = []
+        for item in found:
+            b = self.entries[item][0]
+            if b[0] <= max_x and b[2] >= min_x and b[1] <= max_y and b[3] >= min_y:
+                result.append(item)
+        return result
+
+    def query_point(self, x, y):
+        return self.query((x, y, x, y))
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
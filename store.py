@@ -0,0 +1,180 @@
+import math
+from array import array
+
+# Codes de type des formes (OTHER : type inconnu, pour batch_collision)
+RECTANGLE, CIRCLE, TRIANGLE, OTHER = 0, 1, 2, -1
+
+# Colonnes géométriques : (rectangle, cercle, triangle)
+#   a : largeur, rayon, base
+#   b : hauteur, -, hauteur
+COLUMNS = ("x", "y", "a", "b", "angle")
+
+
+class ShapeStore:
+    """
+    Géométrie des formes d'un ShapeGroup rangée par colonnes dans des
+    tableaux typés contigus (module array) : type, x, y, a, b, angle.
+    Chaque forme rattachée n'est qu'une vue sur sa ligne (`shape._row`) :
+    ses attributs géométriques lisent et écrivent directement ces tableaux.
+
+    Une forme retirée reprend ses valeurs et la dernière ligne vient
+    combler le trou : l'ordre des lignes n'est donc pas l'ordre d'ajout
+    (celui-ci reste celui de ShapeGroup.children).
+    """
+
+    def __init__(self):
+        self.kind = array("b")
+        self.x = array("d")
+        self.y = array("d")
+        self.a = array("d")
+        self.b = array("d")
+        self.angle = array("d")
+        self.shapes = []  # ligne -> forme
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def attach(self, shape):
+        values = dict.fromkeys(COLUMNS, 0.0)
+        for field in shape._geometry_fields:
+            values[field.column] = field.__get__(shape)
+            field.slot.__delete__(shape)  # la ligne devient la seule copie
+        self.kind.append(shape.KIND)
+        for name in COLUMNS:
+            getattr(self, name).append(values[name])
+        shape._row = len(self.shapes)
+        shape._store = self
+        self.shapes.append(shape)
+
+    def extend(self, kind, x, y, a, b, angle):
+        """
+        Ajoute des lignes en bloc à partir de colonnes (tableaux array de
+        même longueur). Renvoie l'indice de la première ligne ; les vues
+        (formes) sont à créer par l'appelant et à ajouter à `shapes`.
+        """
+        start = len(self.kind)
+        self.kind.extend(kind)
+        self.x.extend(x)
+        self.y.extend(y)
+        self.a.extend(a)
+        self.b.extend(b)
+        self.angle.extend(angle)
+        return start
+
+    def detach(self, shape):
+        row = shape._row
+        values = {field: field.__get__(shape) for field in shape._geometry_fields}
+        shape._store = None
+        shape._row = None
+        for field, value in values.items():
+            field.__set__(shape, value)
+
+        last = len(self.shapes) - 1
+        if row != last:
+            moved = self.shapes[last]
+            self.shapes[row] = moved
+            moved._row = row
+            self.kind[row] = self.kind[last]
+            for name in COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+        self.shapes.pop()
+        self.kind.pop()
+        for name in COLUMNS:
+            getattr(self, name).pop()
+
+    # --- Opérations sur les colonnes ---
+
+    def row_area(self, row):
+        # Mêmes formules que AreaCalculatorVisitor
+        kind, a, b = self.kind[row], self.a[row], self.b[row]
+        if kind == RECTANGLE:
+            return a * b
+        if kind == CIRCLE:
+            return math.pi * a ** 2
+        return (a * b) / 2
+
+    def row_bbox(self, row):
+        """
+        Boîte englobante d'une ligne, avec les mêmes opérations flottantes
+        que _compute_geometry, sans construire les sommets de la forme.
+        """
+        kind, x, y, a, b = self.kind[row], self.x[row], self.y[row], self.a[row], self.b[row]
+        if kind == CIRCLE:
+            return x, y, x + 2 * a, y + 2 * a
+        θ = math.radians(self.angle[row])
+        cos_t, sin_t = math.cos(θ), math.sin(θ)
+        cx = x + a / 2
+        if kind == RECTANGLE:
+            cy = y + b / 2
+            points = ((x, y), (x + a, y), (x + a, y + b), (x, y + b))
+        else:
+            cy = y + (b * 2/3)
+            points = ((x, y + b), (x + a / 2, y), (x + a, y + b))
+        xs, ys = [], []
+        for px, py in points:
+            dx, dy = px - cx, py - cy
+            xs.append(dx * cos_t - dy * sin_t + cx)
+            ys.append(dx * sin_t + dy * cos_t + cy)
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def column(self, name):
+        """
+        Vue NumPy sans copie d'une colonne, valable jusqu'au prochain ajout
+        ou retrait.
+        """
+        import numpy as np
+        data = getattr(self, name)
+        return np.frombuffer(data, dtype=np.int8 if name == "kind" else np.float64)
+
+    def bboxes(self, start=0):
+        """
+        Boîtes englobantes des lignes à partir de `start`, tableau NumPy (n, 4),
+        avec les mêmes opérations flottantes que les méthodes _compute_geometry
+        (cosinus et sinus calculés par le module math, une fois par angle).
+        """
+        import numpy as np
+        kind = self.column("kind")[start:]
+        x, y, a, b = (self.column(name)[start:] for name in ("x", "y", "a", "b"))
+        angles, inverse = np.unique(self.column("angle")[start:], return_inverse=True)
+        cos_t = np.array([math.cos(math.radians(t)) for t in angles.tolist()])[inverse]
+        sin_t = np.array([math.sin(math.radians(t)) for t in angles.tolist()])[inverse]
+
+        rect = kind == RECTANGLE
+        cx = x + a / 2
+        cy = np.where(rect, y + b / 2, y + (b * 2/3))
+        # Sommets avant rotation : rectangle (4), triangle (3, le dernier répété)
+        px = np.stack([x, np.where(rect, x + a, x + a / 2), x + a, np.where(rect, x, x + a)], axis=1)
+        py = np.stack([np.where(rect, y, y + b), y, y + b, y + b], axis=1)
+        dx = px - cx[:, np.newaxis]
+        dy = py - cy[:, np.newaxis]
+        qx = dx * cos_t[:, np.newaxis] - dy * sin_t[:, np.newaxis] + cx[:, np.newaxis]
+        qy = dx * sin_t[:, np.newaxis] + dy * cos_t[:, np.newaxis] + cy[:, np.newaxis]
+
+        boxes = np.stack([qx.min(axis=1), qy.min(axis=1), qx.max(axis=1), qy.max(axis=1)], axis=1)
+        circle = kind == CIRCLE
+        boxes[circle] = np.stack([x, y, x + 2 * a, y + 2 * a], axis=1)[circle]
+        return boxes
+
+    def out_of_bounds(self, width, height):
+        """
+        Formes dont la boîte englobante sort de la pièce [0, width] × [0, height],
+        dans l'ordre des lignes : test vectorisé sur les colonnes avec NumPy,
+        sinon ligne par ligne.
+        """
+        if not self.shapes:
+            return []
+        try:
+            boxes = self.bboxes()
+        except ImportError:
+            return [
+                self.shapes[row] for row in range(len(self.shapes))
+                if not _inside(self.row_bbox(row), width, height)
+            ]
+        outside = (boxes[:, 0] < 0) | (boxes[:, 1] < 0) | (boxes[:, 2] > width) | (boxes[:, 3] > height)
+        return [self.shapes[row] for row in outside.nonzero()[0].tolist()]
+
+
+def _inside(bbox, width, height):
+    min_x, min_y, max_x, max_y = bbox
+    return min_x >= 0 and min_y >= 0 and max_x <= width and max_y <= height
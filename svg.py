@@ -0,0 +1,74 @@
+from xml.sax.saxutils import escape, quoteattr
+
+from visitor import ShapeVisitor
+
+BACKGROUND = "#f0e6d6"
+FONT_SIZE = 14
+
+
+def _num(value):
+    return f"{value:.10g}"
+
+
+def _points(points):
+    return " ".join(f"{_num(x)},{_num(y)}" for x, y in points)
+
+
+class SvgExportVisitor(ShapeVisitor):
+    """
+    Écrit chaque forme visitée dans un fichier SVG ouvert : polygone tourné
+    pour les rectangles et triangles, <circle> pour les cercles, puis le
+    nom au centre. Rien n'est gardé en mémoire entre deux formes.
+    """
+
+    def __init__(self, out, progress=None, total=0):
+        self.out = out
+        self.progress = progress
+        self.total = total
+        self.count = 0
+
+    def _label(self, shape):
+        cx, cy = shape.get_center()
+        self.out.write(f'<text x="{_num(cx)}" y="{_num(cy)}">{escape(shape.name)}</text>\n')
+        self.count += 1
+        if self.progress is not None and self.count % 1000 == 0:
+            self.progress(self.count / self.total if self.total else 0.0)
+
+    def _polygon(self, shape, points):
+        self.out.write(f'<polygon points="{_points(points)}" fill={quoteattr(shape.color)} stroke="black"/>\n')
+        self._label(shape)
+
+    def visit_rectangle(self, rectangle):
+        self._polygon(rectangle, rectangle.get_corners())
+
+    def visit_triangle(self, triangle):
+        self._polygon(triangle, triangle.get_vertices())
+
+    def visit_circle(self, circle):
+        cx, cy = circle.get_center()
+        self.out.write(
+            f'<circle cx="{_num(cx)}" cy="{_num(cy)}" r="{_num(circle.radius)}" '
+            f'fill={quoteattr(circle.color)}/>\n'
+        )
+        self._label(circle)
+
+
+def export_svg(group, width, height, filename, progress=None):
+    """
+    Exporte le plan en SVG, directement depuis le ShapeGroup (ou toute forme
+    acceptant un visiteur), sans passer par le canvas ni par une image.
+    Le fichier est écrit au fil de la visite, à travers un tampon.
+    `progress` reçoit la fraction de formes écrites.
+    """
+    total = len(getattr(group, "children", ()))
+    with open(filename, "w", encoding="utf-8", buffering=1 << 16) as out:
+        out.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}" height="{_num(height)}" '
+            f'viewBox="0 0 {_num(width)} {_num(height)}">\n'
+            f'<rect width="100%" height="100%" fill="{BACKGROUND}"/>\n'
+            '<g font-family="Arial, sans-serif" '
+            f'font-size="{FONT_SIZE}" text-anchor="middle" dominant-baseline="central">\n'
+        )
+        group.accept(SvgExportVisitor(out, progress, total))
+        out.write("</g>\n</svg>\n")
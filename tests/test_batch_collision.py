@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_collision import ShapeArrays, collide_matrix, collide_one
+from shape import RectangleShape, CircleShape, TriangleShape
+
+
+def _random_shapes(rng, count, size=40):
+    # Petite zone et coordonnées souvent entières : beaucoup de
+    # chevauchements et de contacts exacts bord à bord
+    shapes = []
+    for i in range(count):
+        x = rng.choice([rng.randrange(size), rng.uniform(0, size)])
+        y = rng.choice([rng.randrange(size), rng.uniform(0, size)])
+        angle = rng.choice([0, 0, 90, 180, 45, rng.uniform(0, 360)])
+        kind = rng.randrange(3)
+        if kind == 0:
+            shapes.append(RectangleShape(f"r{i}", x, y, rng.randint(1, 12), rng.randint(1, 12), "red", angle=angle))
+        elif kind == 1:
+            shapes.append(CircleShape(f"c{i}", x, y, rng.randint(1, 6), "red"))
+        else:
+            shapes.append(TriangleShape(f"t{i}", x, y, rng.randint(1, 12), rng.randint(1, 12), "red", angle=angle))
+    return shapes
+
+
+def _expected(candidates, obstacles):
+    return np.array([[a.intersects_with(b) for b in obstacles] for a in candidates], dtype=bool)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_intersects_with_on_random_pairs(seed):
+    rng = random.Random(seed)
+    shapes = _random_shapes(rng, 60)
+
+    result = collide_matrix(shapes, shapes)
+
+    assert (result == _expected(shapes, shapes)).all()
+
+
+def test_matches_intersects_with_on_touching_pairs():
+    square = RectangleShape("square", 10, 10, 10, 10, "red")
+    shapes = [
+        square,
+        RectangleShape("right", 20, 10, 5, 10, "red"),         # bord commun
+        RectangleShape("corner", 20, 20, 5, 5, "red"),         # coin commun
+        RectangleShape("gap", 21, 10, 5, 5, "red"),            # séparé d'une unité
+        RectangleShape("upright", 10, 0, 10, 10, "red", angle=90),
+        CircleShape("tangent", 20, 12, 3, "red"),              # centre (23, 15) : tangent au bord droit
+        CircleShape("circle", 26, 12, 3, "red"),               # tangent au cercle précédent
+        CircleShape("corner_circle", 20, 20, 1, "red"),
+        TriangleShape("apex", 10, 20, 10, 5, "red"),           # base sur le bord bas du carré
+        TriangleShape("tilted", 0, 10, 10, 10, "red", angle=45),
+    ]
+
+    assert (collide_matrix(shapes, shapes) == _expected(shapes, shapes)).all()
+    assert (collide_one(square, shapes) == _expected([square], shapes)[0]).all()
+
+
+def test_translated_candidates_and_mask():
+    rng = random.Random(1)
+    obstacles = _random_shapes(rng, 30)
+    probe = TriangleShape("probe", 0, 0, 8, 6, "red", angle=30)
+    offsets = [(dx, dy) for dx in range(0, 40, 3) for dy in range(0, 40, 4)]
+    mask = np.array([[rng.random() < 0.7 for _ in obstacles] for _ in offsets])
+
+    result = collide_matrix(ShapeArrays([probe]).translated(np.array(offsets, dtype=float)), obstacles, mask)
+
+    expected = []
+    for dx, dy in offsets:
+        probe.x, probe.y = dx, dy
+        expected.append([probe.intersects_with(other) for other in obstacles])
+    assert (result == (np.array(expected) & mask)).all()
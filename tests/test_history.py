@@ -0,0 +1,82 @@
+import pytest
+
+from history import pose_of
+from room import RoomModel
+from shape import RectangleShape, CircleShape, TriangleShape
+
+
+def _room():
+    room = RoomModel(200, 200)
+    room.place(RectangleShape("a", 10, 10, 20, 10, "red"), (10, 10))
+    room.place(CircleShape("b", 100, 100, 8, "blue"), (100, 100))
+    room.place(TriangleShape("c", 150, 20, 20, 15, "green"), (150, 20))
+    return room
+
+
+def _state(room):
+    return [(shape.name, pose_of(shape)) for shape in room.shapes], room.shape_group.total_area
+
+
+def _round_trip(room, before):
+    after = _state(room)
+    room.undo()
+    assert _state(room) == before
+    room.redo()
+    assert _state(room) == after
+
+
+def test_add_undo_redo():
+    room = _room()
+    before = _state(room)
+    room.place(RectangleShape("d", 0, 0, 5, 5, "red"), (60, 60))
+    _round_trip(room, before)
+
+
+@pytest.mark.parametrize("name", ["a", "b", "c"])
+def test_remove_undo_restores_stacking_order(name):
+    room = _room()
+    before = _state(room)
+    shape = next(s for s in room.shapes if s.name == name)
+    room.remove(shape)
+    _round_trip(room, before)  # l'ordre de room.shapes fait partie de l'état
+
+
+def test_move_and_rotate_undo_redo():
+    room = _room()
+    shape = room.shapes[0]
+    before = _state(room)
+    assert room.move(shape, 40, 60)
+    _round_trip(room, before)
+
+    room.history.seal()
+    before = _state(room)
+    room.rotate(shape, 90)
+    _round_trip(room, before)
+
+
+def test_consecutive_moves_merge_until_seal():
+    room = _room()
+    shape = room.shapes[0]
+    start = _state(room)
+    for x in (20, 30, 40):
+        assert room.move(shape, x, 10)
+    room.history.seal()
+    middle = _state(room)
+    assert room.move(shape, 50, 10)
+
+    room.undo()
+    assert _state(room) == middle
+    room.undo()
+    assert _state(room) == start
+    assert len(room.history.undo_stack) == 3  # les trois ajouts de _room
+
+
+def test_pack_is_a_single_entry():
+    room = _room()
+    before = _state(room)
+    shapes = [RectangleShape(str(i), 0, 0, 10, 10, "red") for i in range(5)]
+    placed, _ = room.pack(shapes)
+    assert placed
+
+    _round_trip(room, before)
+    assert room.shape_group.total_area == pytest.approx(before[1] + 100 * len(placed))
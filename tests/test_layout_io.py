@@ -0,0 +1,89 @@
+import pytest
+
+import layout_io
+from history import pose_of
+from room import RoomModel
+from shape import RectangleShape, CircleShape, TriangleShape
+
+
+def _room():
+    room = RoomModel(300, 200.5)
+    room.shape_group.add_many([
+        RectangleShape("table", 10, 10, 40, 20, "red"),
+        RectangleShape("étagère", 100.25, 50, 30, 8, "#12ab34", angle=30),
+        CircleShape("pouf", 200, 20, 12.5, "blue"),
+        TriangleShape("coin", 60, 120, 25, 15, "green", angle=135),
+        RectangleShape("banc", 150, 150, 50, 10, "grey", angle=90),
+    ])
+    # Un retrait : les lignes du ShapeStore ne suivent plus l'ordre d'empilement
+    room.shape_group.remove(room.shapes[1])
+    return room
+
+
+def _describe(room):
+    return [
+        (type(shape).__name__, shape.name, shape.color, pose_of(shape),
+         layout_io.shape_to_spec(shape))
+        for shape in room.shapes
+    ]
+
+
+@pytest.mark.parametrize("filename", ["plan.spl", "plan.json"])
+def test_round_trip(tmp_path, filename):
+    room = _room()
+    path = str(tmp_path / filename)
+
+    layout_io.save(room, path)
+    loaded = layout_io.load(path, check=True)
+
+    assert (loaded.width, loaded.height) == (room.width, room.height)
+    assert _describe(loaded) == _describe(room)
+    assert loaded.used_area() == pytest.approx(room.used_area())
+
+
+@pytest.mark.parametrize("filename", ["plan.spl", "plan.json"])
+def test_overlapping_layout_fails_check(tmp_path, filename):
+    room = RoomModel(100, 100)
+    room.shape_group.add_many([RectangleShape("a", 0, 0, 20, 20, "red"),
+                               RectangleShape("b", 10, 10, 20, 20, "red")])
+    path = str(tmp_path / filename)
+    layout_io.save(room, path)
+
+    assert len(layout_io.load(path).shapes) == 2
+    with pytest.raises(layout_io.InvalidLayout):
+        layout_io.load(path, check=True)
+
+
+def _corrupt(data, offset, replacement):
+    return data[:offset] + replacement + data[offset + len(replacement):]
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"",
+    lambda data: data[:len(data) // 2],
+    lambda data: data[:-1],
+    lambda data: _corrupt(data, 0, b"PNG!"),                         # signature
+    lambda data: _corrupt(data, layout_io._HEADER.size, b"\x07"),    # type de forme
+    lambda data: data[:-len("grey")] + b"\xff\xfe\xfd\xfc",          # couleur non UTF-8
+])
+def test_corrupt_binary_raises_invalid_layout(tmp_path, damage):
+    path = tmp_path / "plan.spl"
+    layout_io.save(_room(), str(path))
+    path.write_bytes(damage(path.read_bytes()))
+
+    with pytest.raises(layout_io.InvalidLayout):
+        layout_io.load(str(path))
+
+
+@pytest.mark.parametrize("damage", [
+    lambda text: text[:len(text) // 2],
+    lambda text: text.replace('"radius"', '"rayon"'),
+    lambda text: text.replace('"circle"', '"hexagon"'),
+])
+def test_corrupt_json_raises_invalid_layout(tmp_path, damage):
+    path = tmp_path / "plan.json"
+    layout_io.save(_room(), str(path))
+    path.write_text(damage(path.read_text(encoding="utf-8")), encoding="utf-8")
+
+    with pytest.raises(layout_io.InvalidLayout):
+        layout_io.load(str(path))
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from placement import find_spawn_position, make_probe, scan_limits
+from shape import RectangleShape, CircleShape, TriangleShape, ShapeGroup
+
+
+def _pixel_scan(shape, width, height, shapes):
+    # Balayage d'origine : chaque position entière, bornes puis collision
+    # dans les deux sens avec chaque forme
+    limits = scan_limits(shape, width, height)
+    if limits is None:
+        return None
+    probe = make_probe(shape)
+    for y in range(limits[1] + 1):
+        for x in range(limits[0] + 1):
+            probe.x, probe.y = x, y
+            min_x, min_y, max_x, max_y = probe.get_bbox()
+            if min_x < 0 or min_y < 0 or max_x > width or max_y > height:
+                continue
+            if not any(probe.intersects_with(other) or other.intersects_with(probe) for other in shapes):
+                return (x, y)
+    return None
+
+
+def _random_shape(rng, name, width, height):
+    # Coordonnées entières une fois sur deux : contacts exacts bord à bord
+    x = rng.choice([rng.randrange(width), rng.uniform(0, width)])
+    y = rng.choice([rng.randrange(height), rng.uniform(0, height)])
+    angle = rng.choice([0, 90, 180, 45, rng.uniform(0, 360)])
+    kind = rng.randrange(3)
+    if kind == 0:
+        return RectangleShape(name, x, y, rng.randint(2, 20), rng.randint(2, 20), "red", angle=angle)
+    if kind == 1:
+        return CircleShape(name, x, y, rng.randint(1, 8), "red")
+    return TriangleShape(name, x, y, rng.randint(2, 20), rng.randint(2, 20), "red", angle=angle)
+
+
+def _layout(rng, width, height, count):
+    group = ShapeGroup()
+    for i in range(count):
+        shape = _random_shape(rng, f"s{i}", width, height)
+        if shape.move_to(shape.x, shape.y, width, height, group):
+            group.add(shape)
+    return group
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_pixel_scan_on_random_layouts(seed):
+    rng = random.Random(seed)
+    width, height = 60, 45
+    group = _layout(rng, width, height, rng.randint(40, 150))
+    probe = _random_shape(rng, "new", width, height)
+
+    expected = _pixel_scan(probe, width, height, group.children)
+    assert find_spawn_position(probe, width, height, group) == expected
+
+
+@pytest.mark.parametrize("probe", [
+    RectangleShape("r", 0, 0, 10, 5, "red"),
+    RectangleShape("r", 0, 0, 10, 5, "red", angle=90),
+    TriangleShape("t", 0, 0, 8, 6, "red", angle=180),
+    TriangleShape("t", 0, 0, 8, 6, "red", angle=30),
+    CircleShape("c", 0, 0, 3, "red"),
+])
+def test_matches_pixel_scan_on_touching_edges(probe):
+    # Grille de rectangles à coordonnées entières, séparés de trous de la
+    # largeur de la sonde exactement : chaque contact se fait bord à bord
+    group = ShapeGroup()
+    for i in range(4):
+        for j in range(3):
+            group.add(RectangleShape(f"b{i}{j}", i * 16, j * 12 + 5, 6, 7, "blue"))
+    group.add(TriangleShape("t", 40, 2, 10, 10, "blue", angle=45))
+
+    expected = _pixel_scan(probe, 64, 40, group.children)
+    assert find_spawn_position(probe, 64, 40, group) == expected
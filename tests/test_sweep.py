@@ -0,0 +1,49 @@
+from shape import RectangleShape, CircleShape, TriangleShape, ShapeGroup
+
+
+def _room(*shapes):
+    group = ShapeGroup()
+    for shape in shapes:
+        group.add(shape)
+    return group
+
+
+def test_rotated_bar_does_not_tunnel_through_post():
+    bar = RectangleShape("bar", 0, 50, 100, 4, "red", angle=45)
+    post = RectangleShape("post", 150, 50.5, 3, 3, "blue")
+    group = _room(bar, post)
+
+    assert bar.sweep_to(220, 50, 400, 300, group)
+    assert not bar.intersects_with(post)
+    # Arrêtée avant le poteau, pas de l'autre côté
+    assert bar.get_center()[0] < 151.5
+    assert bar.x > 0
+
+
+def test_sweep_stops_within_tolerance_of_contact():
+    mover = RectangleShape("a", 0, 0, 10, 10, "red")
+    wall = RectangleShape("b", 50, 0, 10, 10, "blue")
+    group = _room(mover, wall)
+
+    assert mover.sweep_to(100, 0, 200, 200, group, tolerance=0.5)
+    assert 39.5 - 1e-9 <= mover.x < 40
+
+
+def test_circle_and_triangle_stop_before_obstacles():
+    circle = CircleShape("c", 0, 0, 5, "red")
+    triangle = TriangleShape("t", 0, 40, 10, 10, "red", angle=30)
+    post = RectangleShape("p", 60, 0, 2, 100, "blue")
+    group = _room(circle, triangle, post)
+
+    for shape in (circle, triangle):
+        assert shape.sweep_to(150, shape.y, 200, 200, group)
+        assert not shape.intersects_with(post) and not post.intersects_with(shape)
+        assert shape.get_bbox()[2] <= 60
+
+
+def test_sweep_stops_at_room_edge():
+    shape = RectangleShape("a", 0, 0, 10, 10, "red")
+    group = _room(shape)
+
+    assert shape.sweep_to(500, 0, 100, 100, group)
+    assert 89 <= shape.x <= 90
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import layout_io
+from room import RoomModel
+from shape import RectangleShape
+from validate_layouts import check_layout, iter_layouts, main, validate_all
+
+
+def _save(path, *shapes):
+    room = RoomModel(100, 100)
+    room.shape_group.add_many(list(shapes))
+    layout_io.save(room, str(path))
+
+
+def test_truncated_binary_layout_raises_invalid_layout(tmp_path):
+    path = tmp_path / "plan.spl"
+    _save(path, RectangleShape("a", 0, 0, 10, 10, "red"))
+    data = path.read_bytes()
+    for size in (0, 10, len(data) // 2, len(data) - 1):
+        path.write_bytes(data[:size])
+        with pytest.raises(layout_io.InvalidLayout):
+            layout_io.load(str(path))
+
+
+def test_corrupt_file_is_reported_and_batch_continues(tmp_path):
+    _save(tmp_path / "a.spl", RectangleShape("a", 0, 0, 10, 10, "red"))
+    _save(tmp_path / "b.spl", RectangleShape("b", 0, 0, 10, 10, "red"))
+    (tmp_path / "b.spl").write_bytes((tmp_path / "b.spl").read_bytes()[:30])
+    (tmp_path / "c.json").write_text("{not json", encoding="utf-8")
+
+    reports = list(validate_all(iter_layouts(str(tmp_path)), workers=1))
+
+    assert [r["layout"] for r in reports] == ["a.spl", "b.spl", "c.json"]
+    assert reports[0]["valid"]
+    assert not reports[1]["valid"] and "error" in reports[1]
+    assert not reports[2]["valid"] and "error" in reports[2]
+
+
+@pytest.mark.parametrize("line", ["[1, 2]", "42", '"plan"', "null", '{"room": 3}',
+                                  '{"room": {"width": "a", "height": 2}, "shapes": []}',
+                                  '{"room": {"width": 10, "height": 10}, "shapes": [{"type": "hexagon"}]}'])
+def test_malformed_jsonl_line_is_an_invalid_report(line):
+    report = check_layout(("plans.jsonl:1", None, line))
+
+    assert report["valid"] is False
+    assert report["error"]
+
+
+def test_main_reports_every_line(tmp_path, capsys):
+    good = {"name": "ok", "room": {"width": 50, "height": 50},
+            "shapes": [{"type": "rectangle", "width": 10, "height": 10}]}
+    source = tmp_path / "plans.jsonl"
+    source.write_text("[1]\n" + json.dumps(good) + "\n", encoding="utf-8")
+
+    assert main([str(source), "--workers", "1", "--json"]) == 1
+    reports = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["valid"] for r in reports] == [False, True]
@@ -0,0 +1,148 @@
+"""
+Vérification en lot de plans, sans interface graphique.
+
+    python validate_layouts.py plans/            # fichiers .json et .spl d'un dossier
+    python validate_layouts.py plans.jsonl       # un plan JSON par ligne
+    cat plans.jsonl | python validate_layouts.py -
+
+Chaque plan est contrôlé (chevauchements, formes hors de la pièce, surface
+dépassée) dans un pool de processus et le rapport est écrit au fil de l'eau,
+une ligne par plan, dans l'ordre d'entrée. Code de sortie 1 si au moins un
+plan est invalide.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import layout_io
+from room import LayoutError
+from visitor import AreaCalculatorVisitor
+
+LAYOUT_EXTENSIONS = (".json", ".spl")
+
+
+def iter_layouts(source):
+    """
+    Plans à vérifier, lus à la demande : (nom, chemin, None) pour un fichier
+    de plan, (nom, None, ligne JSON) pour une ligne d'un flux JSONL
+    (`source` vaut "-" pour l'entrée standard).
+    """
+    if source != "-" and os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            if entry.lower().endswith(LAYOUT_EXTENSIONS):
+                yield entry, os.path.join(source, entry), None
+        return
+
+    f = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for lineno, line in enumerate(f, 1):
+            if line.strip():
+                yield f"{source}:{lineno}", None, line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def check_layout(item):
+    """
+    Rapport de vérification d'un plan (dictionnaire sérialisable en JSON).
+    Exécuté dans les processus du pool. Toute erreur propre à ce plan
+    (fichier illisible, structure incorrecte, ou autre) en fait un plan
+    invalide : le reste du lot continue.
+    """
+    name, path, line = item
+    report = {"layout": name}
+    try:
+        if path is not None:
+            room = layout_io.load(path)
+        else:
+            data = json.loads(line)
+            if isinstance(data, dict):
+                report["layout"] = data.get("name", name)
+            room = layout_io.layout_from_data(data)
+
+        visitor = AreaCalculatorVisitor()
+        room.shape_group.accept(visitor)
+        used = visitor.get_total_area()
+        pairs, out_of_bounds = room.validate_layout()
+    except (OSError, LayoutError) as error:
+        report.update(valid=False, error=str(error))
+        return report
+    except Exception as error:
+        report.update(valid=False, error=f"{type(error).__name__} : {error}")
+        return report
+
+    report.update(
+        valid=not pairs and not out_of_bounds and used <= room.area,
+        shapes=len(room.shapes),
+        room_area=room.area,
+        used_area=used,
+        area_overflow=used > room.area,
+        overlaps=[[first.name, second.name] for first, second in pairs],
+        out_of_bounds=[shape.name for shape in out_of_bounds],
+    )
+    return report
+
+
+def validate_all(items, workers=None, max_pending=None):
+    """
+    Rapports des plans de `items`, dans l'ordre, calculés par un pool de
+    `workers` processus (un seul : dans le processus courant). Au plus
+    `max_pending` plans sont en cours à la fois : les entrées sont lues
+    au rythme des résultats et la mémoire reste constante.
+    """
+    if workers == 1:
+        yield from map(check_layout, items)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(check_layout, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def format_report(report):
+    if "error" in report:
+        return f"ERREUR  {report['layout']} : {report['error']}"
+    if report["valid"]:
+        return f"OK      {report['layout']} ({report['shapes']} formes)"
+    problems = []
+    if report["overlaps"]:
+        pairs = ", ".join(f"{a}/{b}" for a, b in report["overlaps"][:5])
+        problems.append(f"{len(report['overlaps'])} chevauchement(s) [{pairs}]")
+    if report["out_of_bounds"]:
+        names = ", ".join(report["out_of_bounds"][:5])
+        problems.append(f"{len(report['out_of_bounds'])} hors de la pièce [{names}]")
+    if report["area_overflow"]:
+        problems.append(f"surface dépassée ({report['used_area']:.2f} > {report['room_area']:.2f})")
+    return f"INVALIDE {report['layout']} : " + " ; ".join(problems)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie des plans de pièce en lot.")
+    parser.add_argument("source", help="dossier de plans (.json, .spl), fichier JSONL, ou - (entrée standard)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="nombre de processus (par défaut : nombre de cœurs)")
+    parser.add_argument("--json", action="store_true", help="rapports en JSONL")
+    args = parser.parse_args(argv)
+
+    total = invalid = 0
+    for report in validate_all(iter_layouts(args.source), args.workers):
+        total += 1
+        invalid += not report["valid"]
+        print(json.dumps(report, ensure_ascii=False) if args.json else format_report(report), flush=True)
+    print(f"{total} plan(s) vérifié(s), {invalid} invalide(s)", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
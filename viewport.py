@@ -0,0 +1,136 @@
+class Viewport:
+    """
+    Vue zoomable et déplaçable d'un ShapeGroup sur un canvas.
+
+    Transformation monde → écran : écran = monde × scale − (offset_x, offset_y).
+    Seules les formes dont la boîte englobante coupe la zone visible sont
+    dessinées (requête sur l'index spatial du groupe) ; les autres sont
+    effacées du canvas. En dessous de `label_scale`, les noms ne sont plus
+    affichés (niveau de détail).
+    """
+
+    def __init__(self, canvas, group, width, height, scale=1.0, label_scale=0.5,
+                 min_scale=0.01, max_scale=20.0):
+        self.canvas = canvas
+        self.group = group
+        self.width = width    # taille du canvas, en pixels
+        self.height = height
+        self.scale = scale
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+        self.label_scale = label_scale
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.drawn = set()
+
+    # --- Transformation ---
+
+    @property
+    def show_labels(self):
+        return self.scale >= self.label_scale
+
+    def to_screen(self, coords):
+        """
+        Coordonnées à plat [x0, y0, x1, y1, ...] du monde vers l'écran.
+        """
+        s = self.scale
+        ox, oy = self.offset_x, self.offset_y
+        result = []
+        for i in range(0, len(coords), 2):
+            result.append(coords[i] * s - ox)
+            result.append(coords[i + 1] * s - oy)
+        return result
+
+    def point_to_screen(self, x, y):
+        return x * self.scale - self.offset_x, y * self.scale - self.offset_y
+
+    def to_world(self, sx, sy):
+        return (sx + self.offset_x) / self.scale, (sy + self.offset_y) / self.scale
+
+    def visible_bbox(self):
+        min_x, min_y = self.to_world(0, 0)
+        max_x, max_y = self.to_world(self.width, self.height)
+        return min_x, min_y, max_x, max_y
+
+    def _visible(self, bbox):
+        min_x, min_y, max_x, max_y = self.visible_bbox()
+        return bbox[0] <= max_x and bbox[2] >= min_x and bbox[1] <= max_y and bbox[3] >= min_y
+
+    # --- Navigation ---
+
+    def fit(self, world_width, world_height):
+        """
+        Zoom qui fait tenir toute la pièce dans le canvas (jamais au-delà de 1).
+        """
+        self.scale = min(1.0, self.width / world_width, self.height / world_height)
+        self.offset_x = self.offset_y = 0.0
+        self.render()
+
+    def zoom(self, factor, sx, sy):
+        """
+        Zoom de `factor` autour du point écran (sx, sy), qui reste fixe.
+        """
+        scale = min(self.max_scale, max(self.min_scale, self.scale * factor))
+        wx, wy = self.to_world(sx, sy)
+        self.scale = scale
+        self.offset_x = wx * scale - sx
+        self.offset_y = wy * scale - sy
+        self.render()
+
+    def pan(self, dx, dy):
+        """
+        Déplace la vue de (dx, dy) pixels écran. Les éléments déjà dessinés
+        sont simplement translatés ; seules les formes qui entrent ou
+        sortent de la zone visible sont dessinées ou effacées.
+        """
+        self.offset_x -= dx
+        self.offset_y -= dy
+        self.canvas.move("all", dx, dy)
+        self._cull()
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+        self._cull()
+
+    # --- Dessin ---
+
+    def _cull(self):
+        visible = set(self.group.query(self.visible_bbox()))
+        for shape in self.drawn - visible:
+            shape.erase(self.canvas)
+        for shape in visible - self.drawn:
+            shape.draw(self.canvas, self)
+        self.drawn = visible
+
+    def render(self):
+        """
+        Met à jour tout ce qui est visible (après un zoom ou un changement
+        de groupe) et efface le reste.
+        """
+        visible = set(self.group.query(self.visible_bbox()))
+        for shape in self.drawn - visible:
+            shape.erase(self.canvas)
+        for shape in visible:
+            shape.refresh(self.canvas, self)
+        self.drawn = visible
+
+    def refresh(self, shape):
+        """
+        À appeler après l'ajout, le déplacement ou la rotation d'une forme.
+        """
+        if shape.group is self.group and self._visible(shape.get_bbox()):
+            shape.refresh(self.canvas, self)
+            self.drawn.add(shape)
+        else:
+            self.erase(shape)
+
+    def erase(self, shape):
+        shape.erase(self.canvas)
+        self.drawn.discard(shape)
+
+    def set_group(self, group):
+        for shape in self.drawn:
+            shape.erase(self.canvas)
+        self.drawn = set()
+        self.group = group